@@ -1,7 +1,9 @@
 import streamlit as st
 import time
 from src.auditor import IntegrityAuditor
-from src.report_generator import generate_pdf_report
+from src.report_generator import ReportRenderer
+from src.ingestion import DocumentIngestor
+from src.chunker import ChunkedDocument, iter_chunks, STRATEGIES, DEFAULT_SIZES
 from src.answer_generator import generate_grounded_answer
 from src.text_utils import normalize_inputs
 from utils import visualizers
@@ -18,11 +20,43 @@ st.set_page_config(
 # --- Initialize ---
 @st.cache_resource
 def get_auditor():
-    return IntegrityAuditor()
+    auditor = IntegrityAuditor()
+    # Never fork a shard pool from the Streamlit server process
+    auditor.shard_workers = 1
+    return auditor
+
+# PDF reports render on a background thread, keyed by a hash of the audit
+# result, so reruns of the same audit reuse the same bytes
+@st.cache_resource
+def get_report_renderer():
+    return ReportRenderer()
+
+# Uploaded files are parsed once per distinct content, not on every rerun.
+# Pages are extracted inline: never fork a process pool from the server process
+@st.cache_resource
+def get_ingestor():
+    return DocumentIngestor(workers=1)
 
 auditor = get_auditor()
+report_renderer = get_report_renderer()
+ingestor = get_ingestor()
 visualizers.apply_custom_css()
 
+def render_report_download(report_future):
+    """Download button once the background render is done, a placeholder until then."""
+    if not report_future.done():
+        st.caption("Preparing PDF report...")
+        return
+    try:
+        pdf_bytes = report_future.result()
+        file_name = f"audit_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        st.download_button("📄 Download Audit Report (PDF)", data=pdf_bytes, file_name=file_name, mime="application/pdf")
+    except Exception as e:
+        st.error(f"Could not generate PDF report: {e}")
+
+# Chunk cards rendered per page in the analysis section
+CHUNKS_PER_PAGE = 20
+
 # --- Branding ---
 st.markdown("""
     <div style='text-align: center; margin-bottom: -20px;'>
@@ -96,18 +130,14 @@ with st.container():
         st.session_state.active_source = 'file'
         # File Processing
         try:
-            file_text = ""
-            if uploaded_file.type == "application/pdf":
-                import pypdf
-                pdf_reader = pypdf.PdfReader(uploaded_file)
-                for page in pdf_reader.pages:
-                    extract = page.extract_text()
-                    if extract: file_text += extract + "\n"
-            else:
-                file_text = uploaded_file.read().decode("utf-8")
-                
-            # Auto-chunking (paragraphs)
-            raw_file_chunks = [c.strip() for c in file_text.split('\n\n') if c.strip()]
+            # Auto-chunking (paragraphs by default)
+            cs1, cs2, cs3 = st.columns(3)
+            strategy = cs1.selectbox("Chunking", STRATEGIES, index=0, key="chunk_strategy")
+            size = cs2.number_input("Units per chunk", min_value=1, value=DEFAULT_SIZES[strategy], key=f"chunk_size_{strategy}")
+            overlap = cs3.number_input("Overlap (units)", min_value=0, max_value=int(size) - 1, value=0, key=f"chunk_overlap_{strategy}")
+            # Pages are chunked as they are extracted (and replayed from the cache on reruns)
+            pages = ingestor.iter_text(uploaded_file.getvalue(), uploaded_file.type)
+            raw_file_chunks = [text for _, _, text in iter_chunks(pages, strategy, int(size), int(overlap))]
             
             if not raw_file_chunks:
                 st.warning("⚠️ File uploaded but no text paragraphs found.")
@@ -128,7 +158,7 @@ with st.container():
         final_query = st.text_area("User Query", value=st.session_state.get('input_query', ""), height=70, placeholder="Enter the user prompt here...", key="manual_query_input")
         chunks_text = st.text_area("Retrieved Chunks (separated by empty lines)", value=st.session_state.get('input_chunks', ""), height=150, placeholder="Chunk 1...\n\nChunk 2...", key="manual_chunks_input")
         if chunks_text:
-            final_chunks = chunks_text.split('\n\n')
+            final_chunks = list(ChunkedDocument(chunks_text))
 
     # Audit Button
     with col_audit:
@@ -146,83 +176,89 @@ with st.container():
                 with st.spinner("Auditing retrieval integrity..."):
                     time.sleep(0.5) # UX delay
                     result = auditor.audit(clean_query, clean_chunks)
+                    answer = generate_grounded_answer(clean_query, clean_chunks, result.relevance_scores, result.score)
                 
-                # --- Audit Results Display ---
-                st.divider()
-                st.subheader("Audit Results")
-                
-                c1, c2 = st.columns([1, 2])
-                with c1:
-                    visualizers.render_status_badge(result.status)
-                    st.write("")
-                    visualizers.plot_integrity_score(result.score, result.status)
-                    
-                with c2:
-                    st.markdown(f"**Summary:** {result.explanation['summary']}")
-                    
-                    # Explainability Tabs
-                    tab1, tab2, tab3 = st.tabs(["Missing", "Redundancy", "Suggestions"])
-                    with tab1:
-                        if result.missing_concepts:
-                            st.error(f"Missing: {', '.join(result.missing_concepts)}")
-                        else:
-                            st.success("No missing concepts detected.")
-                    with tab2:
-                        if result.redundancy_score > 0.1:
-                            st.warning(result.explanation['redundancy_note'])
-                        else:
-                            st.success("Redundancy is low.")
-                    with tab3:
-                        st.info(result.explanation['improvement_tip'])
-                        
-                    # PDF Report
-                    pdf_bytes = generate_pdf_report(result, clean_query)
-                    file_name = f"audit_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                    st.download_button("📄 Download Audit Report (PDF)", data=pdf_bytes, file_name=file_name, mime="application/pdf")
-
-                # --- Answer Generation (Optional & Gated) ---
-                # Threshold check: defined in src.answer_generator but checked here for UI flow?
-                # Actually, the requirement says "Answer generation... Gated by integrity score".
-                # We should call it, and if it returns check, display.
-                # Or check score first. The logic is inside generate_grounded_answer too.
-                
-                st.divider()
-                st.subheader("Grounded Answer Generation")
-                
-                # Check threshold locally or let generator handle?
-                # Let's let generator handle and check logical flag.
-                
-                gen_result = generate_grounded_answer(clean_query, clean_chunks, result.relevance_scores, result.score)
-                
-                if gen_result['is_grounded']:
-                    st.success("✅ Integrity sufficient for answer generation.")
-                    st.markdown(f"**Answer:**\n\n{gen_result['answer']}")
-                    st.caption(f"Sources used: {gen_result['sources']}")
-                else:
-                    st.warning("⚠️ Retrieval Integrity too low for confident answer generation.")
-                    st.markdown(f"_{gen_result['answer']}_")
-
-                # --- Chunk Analysis ---
-                st.divider()
-                st.subheader(f"Chunk Analysis ({len(clean_chunks)} chunks)")
+                # Kept in session state so paging through chunks (a rerun) doesn't re-audit
+                st.session_state.audit = {"query": clean_query, "chunks": clean_chunks, "result": result, "answer": answer}
+                st.session_state.chunk_page = 1
+        
+        if st.session_state.get("audit"):
+            audit = st.session_state.audit
+            clean_query, clean_chunks = audit["query"], audit["chunks"]
+            result, gen_result = audit["result"], audit["answer"]
+            
+            # Start the PDF now; it renders while the rest of the page is drawn
+            # (reruns of the same audit get the already rendered bytes)
+            report_future = report_renderer.submit(result, clean_query)
+            
+            # --- Audit Results Display ---
+            st.divider()
+            st.subheader("Audit Results")
+            
+            c1, c2 = st.columns([1, 2])
+            with c1:
+                visualizers.render_status_badge(result.status)
+                st.write("")
+                visualizers.plot_integrity_score(result.score, result.status)
                 
-                chunk_cols = st.columns(2)
-                # Compute redundancy flags for UI
-                # (Simple pairwise check matches app logic)
-                from src import metrics
-                processed = []
-                red_flags = []
-                for c in clean_chunks:
-                    is_red = False
-                    for p in processed:
-                        if metrics.compute_jaccard_similarity(c, p) > 0.6:
-                            is_red = True
-                            break
-                    processed.append(c)
-                    red_flags.append(is_red)
+            with c2:
+                st.markdown(f"**Summary:** {result.explanation['summary']}")
                 
-                for i, (chunk, score, is_r) in enumerate(zip(clean_chunks, result.relevance_scores, red_flags)):
-                    with chunk_cols[i % 2]:
-                        visualizers.render_chunk_card(i, chunk, score, is_r)
+                # Explainability Tabs
+                tab1, tab2, tab3 = st.tabs(["Missing", "Redundancy", "Suggestions"])
+                with tab1:
+                    if result.missing_concepts:
+                        st.error(f"Missing: {', '.join(result.missing_concepts)}")
+                    else:
+                        st.success("No missing concepts detected.")
+                with tab2:
+                    if result.redundancy_score > 0.1:
+                        st.warning(result.explanation['redundancy_note'])
+                    else:
+                        st.success("Redundancy is low.")
+                with tab3:
+                    st.info(result.explanation['improvement_tip'])
+                    
+                # PDF Report: never waits on the render; the fragment polls
+                # the future on its own reruns until the bytes are ready
+                st.fragment(run_every=None if report_future.done() else 1.0)(render_report_download)(report_future)
+
+            # --- Answer Generation (Optional & Gated) ---
+            # The gate itself lives in generate_grounded_answer; it ran with the audit.
+            st.divider()
+            st.subheader("Grounded Answer Generation")
+            
+            if gen_result['is_grounded']:
+                st.success("✅ Integrity sufficient for answer generation.")
+                st.markdown(f"**Answer:**\n\n{gen_result['answer']}")
+                st.caption(f"Sources used: {gen_result['sources']}")
+            else:
+                st.warning("⚠️ Retrieval Integrity too low for confident answer generation.")
+                st.markdown(f"_{gen_result['answer']}_")
+
+            # --- Chunk Analysis ---
+            st.divider()
+            st.subheader(f"Chunk Analysis ({len(clean_chunks)} chunks)")
+            
+            # A chunk is flagged when it near-duplicates an earlier one; the audit
+            # already found those pairs while scoring redundancy
+            red_flags = [False] * len(clean_chunks)
+            for _, j, _ in result.near_duplicates:
+                red_flags[j] = True
+            
+            # Only one page of cards is rendered per run
+            pages = max(1, -(-len(clean_chunks) // CHUNKS_PER_PAGE))
+            page = 1
+            if pages > 1:
+                page = int(st.number_input("Page", min_value=1, max_value=pages, step=1, key="chunk_page"))
+            first = (page - 1) * CHUNKS_PER_PAGE
+            last = min(first + CHUNKS_PER_PAGE, len(clean_chunks))
+            if pages > 1:
+                st.caption(f"Showing chunks {first + 1}-{last} of {len(clean_chunks)}")
+            
+            chunk_cols = st.columns(2)
+            for i in range(first, last):
+                with chunk_cols[i % 2]:
+                    visualizers.render_chunk_card(i, clean_chunks[i], result.relevance_scores[i], red_flags[i])
 
     st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Streaming command-line auditor for retriever logs.
+
+Reads one JSON record per line, e.g.
+    {"id": "req-1", "query": "...", "chunks": ["...", "..."]}
+from JSONL files or stdin, audits each with IntegrityAuditor and writes one
+JSONL/CSV row per record. Records are processed as a stream through
+IntegrityAuditor.audit_batch, so memory stays bounded regardless of input size.
+
+Every output row carries the source file and the byte offset just past its
+record. With --checkpoint, the last completed position is saved periodically,
+after the rows it covers have been fsynced, and a restarted run resumes from
+it, truncating any rows written past it. --offset may point into the middle of
+a line; reading starts at the next line.
+
+Examples:
+    python audit_cli.py logs/*.jsonl -o audits.jsonl --workers 8 --checkpoint sweep.ckpt
+    cat log.jsonl | python audit_cli.py --format csv > audits.csv
+    python audit_cli.py big.jsonl --offset 10485760
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.auditor import IntegrityAuditor
+from src.text_utils import normalize_inputs
+
+OUTPUT_FIELDS = [
+    "id", "source", "offset", "status", "score", "avg_relevance",
+    "coverage_score", "redundancy_score", "missing_concepts", "elapsed_ms", "error",
+]
+
+
+def iter_records(paths: List[str], start: Optional[Tuple[int, int]] = None,
+                 query_field: str = "query", chunks_field: str = "chunks",
+                 id_field: str = "id") -> Iterator[Dict]:
+    """
+    Yields parsed records with their source and end byte offset.
+
+    Args:
+        paths: Input files; "-" reads stdin
+        start: (path index, byte offset) to resume from; an offset inside a
+            line is advanced to the start of the next line
+    """
+    first_path, first_offset = start or (0, 0)
+    for path_idx, path in enumerate(paths):
+        if path_idx < first_path:
+            continue
+        offset = first_offset if path_idx == first_path else 0
+
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            if offset:
+                # Position one byte early: if that byte ends a line the offset
+                # is already a record boundary, otherwise skip the partial line
+                if stream.seekable():
+                    stream.seek(offset - 1)
+                else:
+                    # stdin: discard bytes up to the resume point
+                    remaining = offset - 1
+                    while remaining:
+                        skipped = stream.read(min(remaining, 1 << 20))
+                        if not skipped:
+                            break
+                        remaining -= len(skipped)
+                if stream.read(1) != b"\n":
+                    offset += len(stream.readline())
+
+            for line in stream:
+                offset += len(line)
+                record = {"source": path, "path_index": path_idx, "offset": offset}
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    record["id"] = data.get(id_field)
+                    record["query"] = data[query_field]
+                    record["chunks"] = data[chunks_field]
+                    # normalize_inputs expects a string query and a list (or string) of chunks
+                    if record["query"] is not None and not isinstance(record["query"], str):
+                        raise TypeError(f"{query_field!r} must be a string")
+                    if record["chunks"] is not None and not isinstance(record["chunks"], (list, str)):
+                        raise TypeError(f"{chunks_field!r} must be a list of strings")
+                except (ValueError, KeyError, AttributeError, TypeError) as e:
+                    record["error"] = f"unparseable record: {type(e).__name__}: {e}"
+                yield record
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+
+def _summarize(record: Dict, item) -> Dict:
+    row = {
+        "id": record.get("id"),
+        "source": record["source"],
+        "offset": record["offset"],
+        "elapsed_ms": round(item.elapsed_ms, 3) if item else None,
+    }
+    error = record.get("error") or (item.error if item else None)
+    if error:
+        row.update(status="Error", error=error)
+        return row
+
+    result = item.result
+    scores = result.relevance_scores
+    row.update(
+        status=result.status,
+        score=round(result.score, 4),
+        avg_relevance=round(sum(scores) / len(scores), 4) if scores else 0.0,
+        coverage_score=round(result.coverage_score, 4),
+        redundancy_score=round(result.redundancy_score, 4),
+        missing_concepts=result.missing_concepts,
+    )
+    return row
+
+
+def run(auditor: IntegrityAuditor, records: Iterator[Dict], workers: int,
+        chunksize: int) -> Iterator[Tuple[Dict, Dict]]:
+    """Audits records in input order and yields (record, output row) pairs."""
+    pending = deque()
+
+    def pairs():
+        # The metadata queue only grows as far ahead as audit_batch prefetches
+        for record in records:
+            pending.append(record)
+            if "error" in record:
+                yield "", []
+            else:
+                yield normalize_inputs(record["query"], record["chunks"])
+
+    for item in auditor.audit_batch(pairs(), workers=workers, chunksize=chunksize):
+        record = pending.popleft()
+        yield record, _summarize(record, None if "error" in record else item)
+
+
+class RowWriter:
+    def __init__(self, stream, fmt: str, header: bool = True):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+            if header:
+                self.csv.writeheader()
+
+    def write(self, row: Dict) -> None:
+        if self.fmt == "csv":
+            flat = dict(row)
+            flat["missing_concepts"] = "; ".join(row.get("missing_concepts") or [])
+            self.csv.writerow(flat)
+        else:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def load_checkpoint(path: str, inputs: List[str]) -> Optional[Dict]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("inputs") != inputs:
+        raise SystemExit(f"Checkpoint {path} was written for different inputs: {state.get('inputs')}")
+    return state
+
+
+def save_checkpoint(path: str, inputs: List[str], path_index: int, offset: int,
+                    output_size: Optional[int]) -> None:
+    # Write-then-rename so a crash never leaves a truncated checkpoint
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"inputs": inputs, "path_index": path_index, "offset": offset,
+                   "output_size": output_size}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def sync_output(out) -> Optional[int]:
+    """Flushes and fsyncs the output file; returns its size (None for stdout)."""
+    out.flush()
+    if out is sys.stdout:
+        return None
+    os.fsync(out.fileno())
+    return os.fstat(out.fileno()).st_size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit (query, chunks) JSONL records from retriever logs.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="JSONL files ('-' or nothing for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output path ('-' for stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=1, help="Audit processes (default: 1, inline)")
+    parser.add_argument("--chunksize", type=int, default=64, help="Records per worker task")
+    parser.add_argument("--offset", type=int, default=0, help="Byte offset to start reading the first input at")
+    parser.add_argument("--checkpoint", help="File recording the last completed position; resumes from it if present")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Records between checkpoint writes")
+    parser.add_argument("--query-field", default="query")
+    parser.add_argument("--chunks-field", default="chunks")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--score-only", action="store_true",
+                        help="Skip explanations and concept lists (missing_concepts is left empty)")
+    args = parser.parse_args(argv)
+
+    state = load_checkpoint(args.checkpoint, args.inputs)
+    start = (state["path_index"], state["offset"]) if state else None
+    if start is None and args.offset:
+        start = (0, args.offset)
+
+    records = iter_records(args.inputs, start, args.query_field, args.chunks_field, args.id_field)
+
+    # Rows written after the last checkpoint are re-audited on resume, so cut
+    # the output back to the size the checkpoint covers
+    if (state and state.get("output_size") is not None
+            and args.output != "-" and os.path.exists(args.output)):
+        os.truncate(args.output, state["output_size"])
+
+    # Appending on resume keeps rows written before the crash
+    mode = "a" if start and args.output != "-" else "w"
+    out = sys.stdout if args.output == "-" else open(args.output, mode, newline="", encoding="utf-8")
+    # On resume the CSV header is already present from the interrupted run
+    writer = RowWriter(out, args.format, header=not (mode == "a" and out.tell() > 0))
+
+    count = 0
+    last = None
+    try:
+        auditor = IntegrityAuditor()
+        auditor.score_only = args.score_only
+        for record, row in run(auditor, records, args.workers, args.chunksize):
+            writer.write(row)
+            count += 1
+            last = (record["path_index"], record["offset"])
+            # The checkpoint is saved only once the rows it covers are on disk
+            if args.checkpoint and count % args.checkpoint_every == 0:
+                save_checkpoint(args.checkpoint, args.inputs, *last, sync_output(out))
+    finally:
+        if args.checkpoint and last is not None:
+            save_checkpoint(args.checkpoint, args.inputs, *last, sync_output(out))
+        else:
+            out.flush()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Audited {count} records.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+Asyncio HTTP sidecar exposing IntegrityAuditor between a retriever and a generator.
+
+Endpoints (JSON in, JSON out):
+    POST /audit   {"query": "...", "chunks": [...]}  -> audit scores and status
+    POST /gate    {"query": "...", "chunks": [...]}  -> audit + generate_grounded_answer
+    GET  /stats   request counts, queue depth and p50/p99 latency of served audits
+    GET  /health  liveness probe
+
+Concurrent requests are collected into micro-batches (up to --max-batch items
+or --max-wait-ms) and each batch is audited on a worker pool, so per-request
+IPC and scheduling costs are amortized. The pending queue is bounded; when it
+is full the server answers 503 immediately instead of letting latency grow.
+
+Run:
+    python audit_server.py --port 8765 --workers 4
+
+SidecarClient at the bottom of this file is a minimal stdlib client for local
+testing and load generation.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src import batch
+from src.answer_generator import generate_grounded_answer
+from src.auditor import IntegrityAuditor
+from src.text_utils import normalize_inputs
+
+
+class Overloaded(Exception):
+    """Raised when the pending-request queue is full."""
+
+
+def _audit_payload(result) -> Dict:
+    return {
+        "score": result.score,
+        "status": result.status,
+        "relevance_scores": result.relevance_scores,
+        "coverage_score": result.coverage_score,
+        "missing_concepts": result.missing_concepts,
+        "redundancy_score": result.redundancy_score,
+    }
+
+
+def process_batch(items: List[Tuple[str, str, List[str]]], auditor: Optional[IntegrityAuditor] = None) -> List[Dict]:
+    """
+    Audits a micro-batch of (kind, query, chunks) items, kind being "audit" or "gate".
+    Runs inside a pool worker, where the auditor was installed by the initializer.
+    """
+    auditor = auditor or batch.worker_auditor()
+    out = []
+    for kind, query, chunks in items:
+        try:
+            result = auditor.audit(query, chunks)
+            payload = _audit_payload(result)
+            if kind == "gate":
+                answer = generate_grounded_answer(query, chunks, result.relevance_scores, result.score)
+                payload.update(
+                    allow=answer["is_grounded"],
+                    answer=answer["answer"],
+                    sources=answer["sources"],
+                )
+            out.append(payload)
+        except Exception as e:
+            out.append({"error": f"{type(e).__name__}: {e}"})
+    return out
+
+
+class LatencyTracker:
+    """Keeps the most recent request latencies for percentile reporting."""
+
+    def __init__(self, window: int = 10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds * 1000.0)
+        self.count += 1
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches dispatched to an executor.
+
+    Args:
+        executor: Pool running process_batch
+        auditor: Passed to process_batch for thread executors (None for process pools)
+        max_batch: Items per batch
+        max_wait_ms: How long the first item of a batch waits for company
+        max_queue: Pending items before new requests are rejected
+        max_inflight: Batches running concurrently (usually the worker count)
+        on_broken: Called with the executor when a batch fails with BrokenProcessPool;
+            returns the replacement executor
+    """
+
+    def __init__(self, executor: Executor, auditor: Optional[IntegrityAuditor], max_batch: int = 32,
+                 max_wait_ms: float = 2.0, max_queue: int = 1024, max_inflight: int = 1,
+                 on_broken: Optional[Callable[[Executor], Executor]] = None):
+        self.executor = executor
+        self.on_broken = on_broken
+        self.auditor = auditor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.inflight = asyncio.Semaphore(max_inflight)
+        self.rejected = 0
+        self.batches = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, kind: str, query: str, chunks: List[str]) -> Dict:
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait(((kind, query, chunks), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise Overloaded()
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Top up with whatever arrived meanwhile without waiting further
+            while len(items) < self.max_batch and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+
+            await self.inflight.acquire()
+            self.batches += 1
+            loop.create_task(self._dispatch(items))
+
+    async def _dispatch(self, items) -> None:
+        executor = self.executor
+        try:
+            payloads = [payload for payload, _ in items]
+            results = await asyncio.get_running_loop().run_in_executor(
+                executor, process_batch, payloads, self.auditor
+            )
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            # A dead worker breaks the whole pool; replace it once (concurrent
+            # batches failing on the same pool must not replace the new one)
+            if isinstance(e, BrokenProcessPool) and self.on_broken is not None and executor is self.executor:
+                self.executor = self.on_broken(executor)
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.inflight.release()
+
+
+class AuditServer:
+    def __init__(self, auditor: IntegrityAuditor, workers: int = 1, use_processes: bool = True,
+                 max_batch: int = 32, max_wait_ms: float = 2.0, max_queue: int = 1024):
+        self.auditor = auditor
+        self.workers = workers
+        if use_processes:
+            self.executor = self._make_process_pool()
+            batch_auditor = None
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+            batch_auditor = auditor
+        self.batcher = MicroBatcher(self.executor, batch_auditor, max_batch=max_batch,
+                                    max_wait_ms=max_wait_ms, max_queue=max_queue, max_inflight=workers,
+                                    on_broken=self._replace_pool)
+        # Latency of served audits only: fast 503 / 400 answers would drag the percentiles down
+        self.latency = LatencyTracker()
+        self.requests = 0
+        self.errors = 0
+        self.pool_restarts = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    def _make_process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=batch.init_worker, initargs=(self.auditor,)
+        )
+
+    def _replace_pool(self, broken: Executor) -> Executor:
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool_restarts += 1
+        self.executor = self._make_process_pool()
+        return self.executor
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> int:
+        """Starts listening; returns the bound port (useful with port=0)."""
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server:
+            self.server.close()
+            # Keep-alive connections would otherwise wait for their next request
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self.server.wait_closed()
+        await self.batcher.stop()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "served": self.latency.count,
+            "errors": self.errors,
+            "rejected": self.batcher.rejected,
+            "batches": self.batcher.batches,
+            "pool_restarts": self.pool_restarts,
+            "queue_depth": self.batcher.queue.qsize(),
+            "latency_ms": {
+                "p50": self.latency.percentile(50),
+                "p99": self.latency.percentile(99),
+            },
+        }
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and path in ("/audit", "/gate"):
+            try:
+                data = json.loads(body or b"{}")
+                query, chunks = normalize_inputs(data.get("query", ""), data.get("chunks", []))
+            except Exception as e:
+                return 400, {"error": f"invalid request body: {type(e).__name__}: {e}"}
+            try:
+                result = await self.batcher.submit(path[1:], query, chunks)
+            except Overloaded:
+                return 503, {"error": "audit queue full, retry later"}
+            except Exception as e:
+                # e.g. BrokenProcessPool; the batcher has already replaced the pool
+                return 500, {"error": f"{type(e).__name__}: {e}"}
+            return (500 if "error" in result else 200), result
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get("content-length", 0) or 0)
+                    if length < 0:
+                        raise ValueError(f"negative Content-Length: {length}")
+                except ValueError as e:
+                    # The stream position is unknown after a malformed request: answer and close
+                    await self._respond(writer, 400, {"error": f"malformed request: {e}"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                if status >= 500 and status != 503:
+                    self.errors += 1
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if path in ("/audit", "/gate"):
+                    self.requests += 1
+                    if status == 200:
+                        self.latency.record(time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except asyncio.CancelledError:
+            # close() cancelling an idle keep-alive connection: finish quietly
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+        )
+        await writer.drain()
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class SidecarClient:
+    """Minimal keep-alive HTTP client for exercising the sidecar locally."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Tuple[int, Dict]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+
+    async def audit(self, query: str, chunks: List[str]) -> Tuple[int, Dict]:
+        return await self.request("POST", "/audit", {"query": query, "chunks": chunks})
+
+    async def gate(self, query: str, chunks: List[str]) -> Tuple[int, Dict]:
+        return await self.request("POST", "/gate", {"query": query, "chunks": chunks})
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+async def _serve(args) -> None:
+    auditor = IntegrityAuditor()
+    auditor.score_only = args.score_only
+    server = AuditServer(
+        auditor, workers=args.workers, use_processes=not args.threads,
+        max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, max_queue=args.max_queue,
+    )
+    port = await server.start(args.host, args.port)
+    print(f"RIGOR-AI sidecar listening on http://{args.host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve IntegrityAuditor over HTTP with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes auditing batches")
+    parser.add_argument("--threads", action="store_true", help="Use a thread pool instead of processes")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument("--score-only", action="store_true",
+                        help="Skip explanations and concept lists (missing_concepts is returned empty)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark suite: times the core pipeline at growing chunk counts, records
+time and peak memory to JSON, and gates against a stored baseline.
+
+    python -m benchmarks.run -o bench.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+
+Exits with status 1 when a case regresses beyond the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import CorpusGenerator
+from src import metrics, text_utils
+from src.auditor import IntegrityAuditor
+from src.answer_generator import generate_grounded_answer
+
+DEFAULT_SIZES = [5, 50, 500, 2000, 10000]
+
+# Case name -> (setup(query, chunks) returning the timed zero-arg callable, max chunk count)
+# The pure-Python pairwise metric is quadratic; above its cap it is skipped
+# unless --no-caps is given.
+def _setup_tokenize(query, chunks):
+    return lambda: [metrics.tokenize(c) for c in chunks]
+
+def _setup_relevance(query, chunks):
+    return lambda: metrics.compute_relevance(query, chunks)
+
+def _setup_redundancy(query, chunks):
+    return lambda: metrics.compute_redundancy(chunks)
+
+def _setup_coverage(query, chunks):
+    concepts = text_utils.extract_key_concepts(query)
+    return lambda: metrics.compute_coverage(concepts, chunks)
+
+def _setup_concepts(query, chunks):
+    # Run over every chunk so the case scales with the input like the others
+    return lambda: [text_utils.extract_key_concepts(c) for c in chunks]
+
+def _setup_audit(query, chunks):
+    auditor = IntegrityAuditor()
+    return lambda: auditor.audit(query, chunks)
+
+def _setup_answer(query, chunks):
+    result = IntegrityAuditor().audit(query, chunks)
+    # Force the gate open so the extractive path is what gets timed
+    return lambda: generate_grounded_answer(query, chunks, result.relevance_scores, 100.0)
+
+def _setup_pdf(query, chunks):
+    from src.report_generator import generate_pdf_report
+    result = IntegrityAuditor().audit(query, chunks)
+    return lambda: generate_pdf_report(result, query)
+
+CASES: Dict[str, tuple] = {
+    "tokenize": (_setup_tokenize, None),
+    "compute_relevance": (_setup_relevance, None),
+    "compute_redundancy": (_setup_redundancy, 2000),
+    "compute_coverage": (_setup_coverage, None),
+    "extract_key_concepts": (_setup_concepts, None),
+    "audit": (_setup_audit, None),
+    "generate_grounded_answer": (_setup_answer, None),
+    "generate_pdf_report": (_setup_pdf, None),
+}
+
+
+def time_call(fn: Callable, min_time: float = 0.2, min_reps: int = 3, max_reps: int = 50) -> Dict:
+    """Repeats fn until min_time has passed (within the rep bounds)."""
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_reps and (len(times) < min_reps or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(times), "min_s": min(times), "reps": len(times)}
+
+
+def peak_memory(fn: Callable) -> int:
+    """Peak traced allocation of one call, in bytes (separate run: tracemalloc skews timing)."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(cases: List[str], sizes: List[int], generator: CorpusGenerator, caps: bool = True,
+        min_time: float = 0.2, log=print) -> Dict[str, Dict]:
+    results = {}
+    for n in sizes:
+        query, chunks = generator.make(n)
+        for name in cases:
+            setup, cap = CASES[name]
+            if caps and cap is not None and n > cap:
+                continue
+            fn = setup(query, chunks)
+            fn()  # warm-up (imports, caches)
+            entry = time_call(fn, min_time=min_time)
+            entry["peak_bytes"] = peak_memory(fn)
+            results[f"{name}@{n}"] = entry
+            log(f"{name:<26} n={n:<6} median={entry['median_s'] * 1000:10.3f} ms  "
+                f"peak={entry['peak_bytes'] / 1024:10.1f} KiB  reps={entry['reps']}")
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float,
+            mem_tolerance: float, min_delta_s: float = 0.001) -> List[str]:
+    """Regression messages for cases slower / larger than baseline beyond the tolerances."""
+    failures = []
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        t, bt = entry["median_s"], base["median_s"]
+        # Ignore sub-millisecond jitter on tiny cases
+        if t > bt * (1 + tolerance) and t - bt > min_delta_s:
+            failures.append(f"{key}: time {bt * 1000:.3f} ms -> {t * 1000:.3f} ms (+{(t / bt - 1) * 100:.0f}%)")
+        m, bm = entry["peak_bytes"], base["peak_bytes"]
+        if bm and m > bm * (1 + mem_tolerance) and m - bm > 64 * 1024:
+            failures.append(f"{key}: peak memory {bm / 1024:.0f} KiB -> {m / 1024:.0f} KiB (+{(m / bm - 1) * 100:.0f}%)")
+    return failures
+
+
+def environment() -> Dict:
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the auditing pipeline on synthetic data.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Chunk counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vocab-size", type=int, default=5000)
+    parser.add_argument("--chunk-words", nargs=2, type=int, default=[20, 80], metavar=("MIN", "MAX"))
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--no-caps", action="store_true", help="Also run quadratic cases above their size cap")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds of repetitions per case")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Baseline JSON to gate against")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--mem-tolerance", type=float, default=0.25, help="Allowed relative peak-memory growth")
+    args = parser.parse_args(argv)
+
+    generator = CorpusGenerator(seed=args.seed, vocab_size=args.vocab_size,
+                                chunk_words=tuple(args.chunk_words), dup_rate=args.dup_rate)
+    results = run(args.cases, args.sizes, generator, caps=not args.no_caps, min_time=args.min_time)
+
+    report = {
+        "environment": environment(),
+        "settings": {"seed": args.seed, "vocab_size": args.vocab_size,
+                     "chunk_words": args.chunk_words, "dup_rate": args.dup_rate},
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != report["settings"]:
+            print("⚠️ Baseline was recorded with different generator settings; comparison may be meaningless.")
+        failures = compare(results, baseline["results"], args.tolerance, args.mem_tolerance)
+        if failures:
+            print(f"\n❌ {len(failures)} regression(s) beyond tolerance:")
+            for line in failures:
+                print("  " + line)
+            return 1
+        print("\n✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
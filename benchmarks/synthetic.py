@@ -0,0 +1,83 @@
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from typing import List, Tuple
+
+# Seeded synthetic retrieval data for the benchmarks.
+#
+# Words are drawn from a Zipf-distributed vocabulary (like real text, a few
+# words dominate), some of them capitalized so the concept extractor finds
+# phrases. A `dup_rate` share of chunks are copies of earlier chunks with a
+# few words swapped, which is what drives the redundancy metric. The query is
+# built from the same vocabulary, so relevance and coverage vary naturally.
+
+SYLLABLES = ["ka", "to", "ri", "mo", "na", "se", "lu", "pe", "di", "ga", "vo", "ex", "an", "ul", "ti"]
+
+
+def make_vocabulary(size: int, seed: int = 0) -> List[str]:
+    """`size` distinct pseudo-words, stable for a given seed."""
+    rng = random.Random(seed)
+    words, seen = [], set()
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+class CorpusGenerator:
+    """
+    Args:
+        seed: Random seed; equal arguments always give equal data
+        vocab_size: Distinct words
+        chunk_words: (min, max) words per chunk
+        dup_rate: Share of chunks that are near-copies of earlier chunks
+        capitalize_rate: Share of words capitalized (concept candidates)
+        zipf_s: Zipf exponent of the word distribution
+    """
+
+    def __init__(self, seed: int = 0, vocab_size: int = 5000, chunk_words: Tuple[int, int] = (20, 80),
+                 dup_rate: float = 0.1, capitalize_rate: float = 0.05, zipf_s: float = 1.1):
+        self.seed = seed
+        self.vocab = make_vocabulary(vocab_size, seed)
+        self.chunk_words = chunk_words
+        self.dup_rate = dup_rate
+        self.capitalize_rate = capitalize_rate
+        self._cum_weights = list(accumulate(1.0 / (rank ** zipf_s) for rank in range(1, vocab_size + 1)))
+
+    def _word(self, rng: random.Random) -> str:
+        i = bisect_left(self._cum_weights, rng.random() * self._cum_weights[-1])
+        word = self.vocab[min(i, len(self.vocab) - 1)]
+        return word.capitalize() if rng.random() < self.capitalize_rate else word
+
+    def _sentence(self, rng: random.Random, n_words: int) -> str:
+        return " ".join(self._word(rng) for _ in range(n_words)) + rng.choice([".", ".", "?", "!"])
+
+    def chunk(self, rng: random.Random) -> str:
+        n = rng.randint(*self.chunk_words)
+        parts = []
+        while n > 0:
+            k = min(n, rng.randint(6, 18))
+            parts.append(self._sentence(rng, k))
+            n -= k
+        return " ".join(parts)
+
+    def query(self, rng: random.Random, n_words: int = 12) -> str:
+        return self._sentence(rng, n_words)
+
+    def make(self, n_chunks: int, case: int = 0) -> Tuple[str, List[str]]:
+        """One (query, chunks) pair; `case` selects a different pair for the same settings."""
+        rng = random.Random(f"{self.seed}:{n_chunks}:{case}")
+        query = self.query(rng)
+        chunks: List[str] = []
+        for _ in range(n_chunks):
+            if chunks and rng.random() < self.dup_rate:
+                words = rng.choice(chunks).split()
+                # Near-duplicate: swap ~10% of the words
+                for _ in range(max(1, len(words) // 10)):
+                    words[rng.randrange(len(words))] = self._word(rng)
+                chunks.append(" ".join(words))
+            else:
+                chunks.append(self.chunk(rng))
+        return query, chunks
@@ -1,8 +1,19 @@
-from dataclasses import dataclass, field
-from typing import List, Dict
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+import os
 import numpy as np
 
-from src import metrics, text_utils, explainer
+from src import metrics, text_utils, explainer, minhash, vectorized, batch
+from src.batch import BatchItem
+from src.cache import AuditCache, audit_key
+from src.feature_store import ChunkFeatureStore
+from src.corpus_stats import CorpusStats, BM25_B, BM25_K1, METRICS as CORPUS_METRICS
+from src.kb_index import KnowledgeBaseIndex
+from src.session import AuditSession
+from src import sweep, mmr, sharding
+from src.mmr import MMRSelection
+from src.evaluation import PoolEvaluator
+from src.instrumentation import AuditTrace, Instrumentation, NO_STAGE
 
 @dataclass
 class AuditResult:
@@ -13,28 +24,226 @@ class AuditResult:
     missing_concepts: List[str]
     redundancy_score: float
     explanation: Dict[str, str] = field(default_factory=dict)
+    # Found concept -> {chunk index: occurrences}
+    concept_hits: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    # Per-stage timings, when instrumentation is enabled with attach=True
+    trace: Optional[AuditTrace] = None
+    # Chunk pairs (i, j, jaccard), i < j, more similar than the auditor's duplicate_threshold
+    near_duplicates: List[Tuple[int, int, float]] = field(default_factory=list)
+    # Missing concept -> ids of knowledge-base documents containing it ([] = corpus gap),
+    # when the auditor has a kb_index
+    corpus_matches: Dict[str, List] = field(default_factory=dict)
+
+def _no_stage(name: str):
+    return NO_STAGE
 
 class IntegrityAuditor:
-    def __init__(self):
+    def __init__(self, cache: Optional[AuditCache] = None, feature_store: Optional[ChunkFeatureStore] = None,
+                 instrumentation: Optional[Instrumentation] = None, corpus_stats: Optional[CorpusStats] = None,
+                 kb_index: Optional[KnowledgeBaseIndex] = None):
         # Weighted Scoring Configuration
         self.w_relevance = 0.4
         self.w_coverage = 0.4
         self.w_redundancy = 0.1
         self.w_penalty = 0.1 # Penalty for gaps
         
-    def audit(self, query: str, chunks: List[str]) -> AuditResult:
+        # Above this many chunks the O(n^2) exact redundancy is replaced by
+        # the sampled MinHash/LSH estimate (see src/minhash.py)
+        self.approx_redundancy_cutoff = 500
+        self.redundancy_epsilon = 0.01
+        self.redundancy_delta = 0.05
+        
+        # Pairs with Jaccard above this are reported in AuditResult.near_duplicates
+        # (exact up to approx_redundancy_cutoff chunks, LSH-detected above it)
+        self.duplicate_threshold = 0.6
+        
+        # Scoring backend: "python" (metrics.py), "numpy" (vectorized.py) or
+        # "auto", which uses numpy when installed and the list is big enough
+        # for matrix setup to pay off
+        self.backend = "auto"
+        self.vectorized_min_chunks = 64
+        
+        # Relevance metric: "overlap" (fraction of query tokens in the chunk),
+        # or "bm25" / "tfidf", IDF-weighted by corpus_stats (see src/corpus_stats.py)
+        self.relevance_metric = "overlap"
+        self.corpus_stats = corpus_stats
+        self.bm25_k1 = BM25_K1
+        self.bm25_b = BM25_B
+        
+        # Optional inverted index over the whole knowledge base (see src/kb_index.py):
+        # missing concepts are looked up in it to tell retrieval misses from corpus gaps
+        self.kb_index = kb_index
+        self.kb_probe_limit = 10
+        
+        # Single audits of at least shard_min_chunks chunks are split into
+        # shards of >= shard_size chunks on a process pool of shard_workers
+        # (None: one per CPU; 1 never shards) -- see src/sharding.py. Never
+        # inside pool workers.
+        self.shard_min_chunks = 20_000
+        self.shard_size = 1_000
+        self.shard_workers = None
+        
+        # Optional result cache (see src/cache.py); hits skip all computation
+        self.cache = cache
+        # Optional per-chunk analysis / pair similarity store (see src/feature_store.py)
+        self.feature_store = feature_store
+        # Optional per-stage timing (see src/instrumentation.py); None costs nothing
+        self.instrumentation = instrumentation
+        
+        # Default for audit(score_only=...): compute score/status/metrics only,
+        # leaving explanation, missing_concepts and concept_hits empty
+        self.score_only = False
+        
+    def scoring_config(self) -> Dict:
+        """Settings that change audit results. Part of the cache key."""
+        config = {
+            "w_relevance": self.w_relevance,
+            "w_coverage": self.w_coverage,
+            "w_redundancy": self.w_redundancy,
+            "w_penalty": self.w_penalty,
+            "approx_redundancy_cutoff": self.approx_redundancy_cutoff,
+            "redundancy_epsilon": self.redundancy_epsilon,
+            "redundancy_delta": self.redundancy_delta,
+            "duplicate_threshold": self.duplicate_threshold,
+        }
+        if self.relevance_metric != "overlap":
+            # Only added when used, so keys of existing overlap-metric entries stay valid
+            config["relevance_metric"] = self.relevance_metric
+            config["bm25"] = [self.bm25_k1, self.bm25_b]
+            config["corpus"] = self.corpus_stats.fingerprint() if self.corpus_stats is not None else None
+        if self.kb_index is not None:
+            config["kb_index"] = [self.kb_index.fingerprint(), self.kb_probe_limit]
+        return config
+        
+    def token_matrix(self, chunk_texts):
+        """Builds the vectorized token matrix if the configured backend calls for it."""
+        if self.backend == "python" or not vectorized.HAS_NUMPY:
+            return None
+        if self.backend == "auto" and len(chunk_texts) < self.vectorized_min_chunks:
+            return None
+        return vectorized.TokenMatrix(chunk_texts)
+        
+    def compute_relevance(self, query_text, chunk_texts, matrix=None) -> List[float]:
+        """Relevance per chunk under the configured metric (`matrix` from token_matrix, if any)."""
+        if self.relevance_metric == "overlap":
+            if matrix is not None:
+                return matrix.relevance(query_text)
+            return metrics.compute_relevance(query_text, chunk_texts)
+        if self.relevance_metric not in CORPUS_METRICS:
+            raise ValueError(f"Unknown relevance metric: {self.relevance_metric!r}")
+        if self.corpus_stats is None:
+            raise ValueError(f"relevance_metric={self.relevance_metric!r} needs corpus_stats")
+        return self.corpus_stats.relevance(query_text, chunk_texts, self.relevance_metric,
+                                           self.bm25_k1, self.bm25_b)
+        
+    def compute_redundancy(self, chunk_texts, matrix=None, threshold: Optional[float] = None) -> Dict:
+        """
+        Redundancy score and near-duplicate pairs (above `threshold`; none when
+        it is None) by the exact, sampled or vectorized path the audit uses.
+        """
+        if len(chunk_texts) > self.approx_redundancy_cutoff:
+            redundancy_data = minhash.estimate_redundancy(
+                chunk_texts, epsilon=self.redundancy_epsilon, delta=self.redundancy_delta,
+                threshold=threshold if threshold is not None else 0.8,
+                find_duplicates=threshold is not None
+            )
+            # LSH reports similarity >= threshold; keep the strict comparison of the exact paths
+            redundancy_data["near_duplicates"] = [
+                p for p in redundancy_data["near_duplicates"] if p[2] > threshold
+            ]
+            return redundancy_data
+        if matrix is not None and matrix.supports_pairwise():
+            return matrix.redundancy_details(threshold)
+        if self.feature_store is not None:
+            return self.feature_store.redundancy_details(chunk_texts, threshold)
+        return metrics.redundancy_details(chunk_texts, threshold)
+        
+    def audit(self, query: str, chunks: List[str], chunk_ids: Optional[List] = None,
+              score_only: Optional[bool] = None) -> AuditResult:
+        """
+        Audits retrieved chunks against the query.
+        `chunk_ids` optionally names chunks for the feature store (defaults to content hashes).
+        `score_only` (default: self.score_only) skips the presentation work gating
+        does not need: the explanation, missing_concepts and concept_hits stay empty.
+        """
+        if score_only is None:
+            score_only = self.score_only
+        trace = AuditTrace() if self.instrumentation is not None else None
+        
+        if self.cache is None:
+            result = self._audit(query, chunks, chunk_ids, trace, score_only)
+        else:
+            config = self.scoring_config()
+            if score_only:
+                # Score-only results are incomplete; keep them apart from full ones
+                config["score_only"] = True
+            key = audit_key(query, chunks, config)
+            result = self.cache.get(key)
+            if result is None:
+                result = self._audit(query, chunks, chunk_ids, trace, score_only)
+                self.cache.put(key, result)
+            elif trace is not None:
+                trace.cache_hit = True
+                
+        if trace is not None:
+            if self.instrumentation.attach:
+                # Never stamp a trace onto the object the cache holds
+                result = replace(result, trace=trace) if self.cache is not None else result
+                result.trace = trace
+            self.instrumentation.emit(trace, result)
+        return result
+        
+    def analyze_chunks(self, chunks: List[str], chunk_ids: Optional[List] = None) -> List[text_utils.AnalyzedText]:
+        """Lexes chunks once, through the feature store when one is configured."""
+        if self.feature_store is not None:
+            return self.feature_store.analyze_all(chunks, chunk_ids)
+        return text_utils.analyze_all(chunks)
+        
+    def _audit(self, query: str, chunks: List[str], chunk_ids: Optional[List] = None,
+               trace: Optional[AuditTrace] = None, score_only: bool = False) -> AuditResult:
         if not query or not chunks:
-            return AuditResult(0, "Insufficient", [], 0, [], 0)
+            return self.build_empty_result()
+        workers = sharding.shard_workers(self, len(chunks))
+        if workers > 1:
+            return sharding.sharded_audit(self, query, chunks, chunk_ids, workers, trace, score_only)
+        stage = trace.stage if trace is not None else _no_stage
             
+        # 0. Lex the query and every chunk exactly once; all metrics share these
+        with stage("analyze"):
+            query_text = text_utils.analyze(query)
+            chunk_texts = self.analyze_chunks(chunks, chunk_ids)
+        if trace is not None:
+            trace.chunk_count = len(chunk_texts)
+            trace.token_count = sum(len(t.tokens) for t in chunk_texts)
+        
         # 1. Compute Metrics
-        relevance_scores = metrics.compute_relevance(query, chunks)
-        avg_relevance = np.mean(relevance_scores) if relevance_scores else 0.0
+        with stage("relevance"):
+            matrix = self.token_matrix(chunk_texts)
+            relevance_scores = self.compute_relevance(query_text, chunk_texts, matrix)
         
-        concepts = text_utils.extract_key_concepts(query)
-        coverage_data = metrics.compute_coverage(concepts, chunks)
-        coverage_score = coverage_data["score"]
+        with stage("concepts"):
+            concepts = text_utils.extract_key_concepts(query_text)
+        with stage("coverage"):
+            coverage_data = metrics.compute_coverage(concepts, chunk_texts, detail=not score_only)
+        
+        with stage("redundancy"):
+            # Near-duplicate pairs fall out of the same pass; score-only skips them
+            threshold = None if score_only else self.duplicate_threshold
+            redundancy_data = self.compute_redundancy(chunk_texts, matrix, threshold)
         
-        redundancy_score = metrics.compute_redundancy(chunks)
+        return self.build_result(relevance_scores, coverage_data, redundancy_data["score"], score_only,
+                                 redundancy_data["near_duplicates"])
+        
+    def build_empty_result(self) -> AuditResult:
+        """Result for a missing query or an empty chunk list."""
+        return AuditResult(0, "Insufficient", [], 0, [], 0)
+        
+    def build_result(self, relevance_scores: List[float], coverage_data: Dict,
+                     redundancy_score: float, score_only: bool = False,
+                     near_duplicates: Optional[List[Tuple[int, int, float]]] = None) -> AuditResult:
+        """Combines computed metrics into the integrity score, status and explanation."""
+        avg_relevance = np.mean(relevance_scores) if relevance_scores else 0.0
+        coverage_score = coverage_data["score"]
         
         # 2. Compute Integrity Score
         # Formula: (Rel * 0.4 + Cov * 0.4) - (Red * 0.1)
@@ -63,10 +272,18 @@ class IntegrityAuditor:
         else:
             status = "Insufficient"
             
-        # 4. Generate Explanation
-        explanation = explainer.generate_audit_explanation(
-            score_100, status, relevance_scores, coverage_data, redundancy_score
-        )
+        # 4. Where the missing concepts are in the knowledge base, if we can tell
+        if not score_only and self.kb_index is not None and coverage_data["missing"]:
+            coverage_data = dict(coverage_data)
+            coverage_data["corpus_matches"] = self.kb_index.probe(coverage_data["missing"], self.kb_probe_limit)
+            
+        # 5. Explanation, generated on first access
+        if score_only:
+            explanation = {}
+        else:
+            explanation = explainer.LazyExplanation.deferred(
+                score_100, status, relevance_scores, coverage_data, redundancy_score
+            )
         
         return AuditResult(
             score=score_100,
@@ -75,5 +292,58 @@ class IntegrityAuditor:
             coverage_score=coverage_score,
             missing_concepts=coverage_data["missing"],
             redundancy_score=redundancy_score,
-            explanation=explanation
+            explanation=explanation,
+            concept_hits=coverage_data["hits"],
+            near_duplicates=near_duplicates or [],
+            corpus_matches=coverage_data.get("corpus_matches", {})
         )
+
+    def audit_batch(self, pairs: Iterable[Tuple[str, List[str]]], workers: Optional[int] = None,
+                    chunksize: int = 16) -> Iterator[BatchItem]:
+        """
+        Audits many (query, chunks) pairs across a process pool.
+        
+        Results are streamed back as BatchItems in input order; a failing
+        pair yields a BatchItem with `error` set instead of aborting the batch.
+        
+        Args:
+            pairs: Iterable of (query, chunks); consumed lazily
+            workers: Process count (defaults to os.cpu_count(); 1 runs inline)
+            chunksize: Pairs sent to a worker per task
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return batch.iter_audits(self, pairs, workers=workers, chunksize=chunksize)
+
+    def session(self, query: str, chunks: Optional[List[str]] = None) -> AuditSession:
+        """
+        Starts an incremental audit: add_chunk / remove_chunk / replace_chunk
+        update the result in O(n) per change instead of a full re-audit.
+        """
+        return AuditSession(self, query, chunks)
+
+    def sweep_top_k(self, query: str, chunks: List[str]) -> List[AuditResult]:
+        """
+        Audits every prefix of a ranked chunk list: element k-1 is the result
+        for chunks[:k]. Computes each similarity once (about one full
+        audit's work) instead of N audits; see src/sweep.py.
+        """
+        return sweep.sweep_top_k(self, query, chunks)
+
+    def rerank_mmr(self, query: str, chunks: List[str], k: int, lambda_mult: float = 0.5,
+                   relevance_scores: Optional[List[float]] = None) -> MMRSelection:
+        """
+        Maximal Marginal Relevance selection of k chunks, returned with the
+        audit of the whole pool and of the selected subset. Both audits and
+        the selection share one analysis and token matrix. `relevance_scores`
+        from a previous audit of the same chunks are reused when given.
+        `lambda_mult` must lie in [0, 1].
+        """
+        return mmr.rerank_mmr(self, query, chunks, k, lambda_mult, relevance_scores)
+
+    def pool_evaluator(self, pool: List[str], chunk_ids: Optional[List] = None) -> PoolEvaluator:
+        """
+        Indexes a shared candidate pool once for evaluating many queries:
+        evaluate(queries, top_k) audits each query's top_k pool chunks.
+        """
+        return PoolEvaluator(self, pool, chunk_ids)
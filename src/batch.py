@@ -0,0 +1,164 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from itertools import islice
+from time import perf_counter
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+# Process-pool plumbing for IntegrityAuditor.audit_batch.
+#
+# Each worker receives a pickled copy of the auditor once (pool initializer),
+# then audits chunks of `chunksize` (query, chunks) pairs per task to amortize
+# IPC. Tasks are submitted lazily with a bounded number in flight, so the
+# input can be an arbitrarily long iterator and results stream back in input
+# order without ever holding the whole batch in memory.
+
+_WORKER_AUDITOR = None
+
+
+@dataclass
+class BatchItem:
+    """One entry of an audit_batch stream. Exactly one of result / error is set."""
+    index: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def init_worker(auditor) -> None:
+    """Pool initializer installing the auditor used by tasks in this process."""
+    global _WORKER_AUDITOR
+    _WORKER_AUDITOR = auditor
+
+
+def worker_auditor():
+    """The auditor installed by init_worker in the current process."""
+    return _WORKER_AUDITOR
+
+
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def audit_pairs(auditor, pairs: List[Tuple[str, List[str]]]) -> List[Tuple[Any, Optional[str], float]]:
+    """
+    Audits pairs one by one, turning per-item exceptions (including a pair
+    that is not a (query, chunks) tuple) into error strings.
+    """
+    out = []
+    for pair in pairs:
+        start = perf_counter()
+        try:
+            query, chunks = pair
+            result, error = auditor.audit(query, chunks), None
+        except Exception as e:
+            result, error = None, _describe(e)
+        out.append((result, error, (perf_counter() - start) * 1000.0))
+    return out
+
+
+def _run_task(pairs):
+    return audit_pairs(_WORKER_AUDITOR, pairs)
+
+
+def iter_audits(auditor, pairs: Iterable[Tuple[str, List[str]]], workers: int,
+                chunksize: int, prefetch: int = 2) -> Iterator[BatchItem]:
+    """
+    Streams BatchItems for `pairs` in input order.
+
+    Args:
+        auditor: Configured IntegrityAuditor (pickled once per worker)
+        pairs: Iterable of (query, chunks)
+        workers: Process count; <= 1 audits inline in this process
+        chunksize: Pairs per task sent to a worker
+        prefetch: Tasks kept in flight per worker
+    """
+    pairs = iter(pairs)
+    chunksize = max(1, chunksize)
+    index = 0
+
+    if workers <= 1:
+        for pair in pairs:
+            (result, error, elapsed), = audit_pairs(auditor, [pair])
+            yield BatchItem(index, result, error, elapsed)
+            index += 1
+        return
+
+    def make_pool(size):
+        return ProcessPoolExecutor(max_workers=size, initializer=init_worker, initargs=(auditor,))
+
+    pool = make_pool(workers)
+    # Entries are [task, future, retried]
+    in_flight = deque()
+    try:
+        while True:
+            while len(in_flight) < workers * prefetch:
+                task = list(islice(pairs, chunksize))
+                if not task:
+                    break
+                in_flight.append([task, _submit(pool, task), False])
+
+            if not in_flight:
+                break
+
+            task, future, retried = in_flight.popleft()
+            try:
+                outcomes = future.result()
+            except BrokenProcessPool:
+                # A worker died (segfault, OOM kill...), failing every task in
+                # flight, not just the culprit. Replace the pool and resubmit
+                # everything; a task that breaks the pool twice is replayed
+                # pair by pair in a quarantine process to isolate the culprit.
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = make_pool(workers)
+                if retried:
+                    outcomes = _quarantine(make_pool, task)
+                else:
+                    in_flight.appendleft([task, None, True])
+                for entry in in_flight:
+                    entry[1] = _submit(pool, entry[0])
+                if not retried:
+                    continue
+            except Exception as e:
+                # e.g. an unpicklable input or result: only this task fails
+                outcomes = [(None, _describe(e), 0.0)] * len(task)
+
+            for result, error, elapsed in outcomes:
+                yield BatchItem(index, result, error, elapsed)
+                index += 1
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _submit(pool, task) -> Future:
+    # A pool can break between two submits; surface that through the future
+    # so it is handled at the head of the queue like any other crash
+    try:
+        return pool.submit(_run_task, task)
+    except BrokenProcessPool as e:
+        failed = Future()
+        failed.set_exception(e)
+        return failed
+
+
+def _quarantine(make_pool, task):
+    """Runs each pair alone in a single-process pool so a crash is attributed exactly."""
+    outcomes = []
+    pool = None
+    for pair in task:
+        if pool is None:
+            pool = make_pool(1)
+        try:
+            outcomes.extend(pool.submit(_run_task, [pair]).result())
+        except BrokenProcessPool as e:
+            outcomes.append((None, _describe(e), 0.0))
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+    if pool is not None:
+        pool.shutdown(wait=True)
+    return outcomes
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Content-addressed cache for audit results.
+#
+# Keys are a SHA-256 over the exact query, the exact chunk list and the
+# auditor's scoring configuration, so a hit is only possible when the audit
+# would produce the same result. Entries live in an in-memory LRU tier
+# (bounded by entry count and optional TTL) and, optionally, in a SQLite file
+# that several processes (batch workers, sidecar workers) can share.
+
+
+def audit_key(query: str, chunks: List[str], config: Dict[str, Any]) -> str:
+    """Stable hash of an audit's inputs. The query and chunks are hashed
+    verbatim: whitespace, order and empty entries can all affect the scores."""
+    h = hashlib.sha256()
+    h.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    h.update(b"\0q")
+    h.update((query or "").encode("utf-8"))
+    for chunk in chunks or []:
+        data = chunk.encode("utf-8")
+        # Length-prefix each chunk so ["ab", "c"] and ["a", "bc"] differ
+        h.update(b"\0c%d:" % len(data))
+        h.update(data)
+    return h.hexdigest()
+
+
+class AuditCache:
+    """
+    Two-tier LRU cache of AuditResults.
+
+    Args:
+        max_entries: In-memory capacity; least recently used entries are evicted
+        ttl: Seconds an entry stays valid (None = forever), applied to both tiers
+        path: Optional SQLite file for a persistent tier shared across processes
+
+    Cached results are returned as-is; treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._init_runtime()
+
+    def _init_runtime(self) -> None:
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # Pool workers receive a pickled auditor: ship only the configuration and
+    # give every process its own memory tier and SQLite connection
+    def __getstate__(self):
+        return {"max_entries": self.max_entries, "ttl": self.ttl, "path": self.path}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime()
+
+    # --- SQLite tier ---
+
+    def _db(self):
+        if self.path is None:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audit_cache (key TEXT PRIMARY KEY, created REAL, value BLOB)"
+            )
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    # --- Public API ---
+
+    def get(self, key: str):
+        """Returns the cached AuditResult for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, result = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._memory[key]
+                self.expirations += 1
+
+            db = self._db()
+            if db is not None:
+                row = db.execute("SELECT created, value FROM audit_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[0], now):
+                    result = pickle.loads(row[1])
+                    self._remember(key, row[0], result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, result)
+            db = self._db()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO audit_cache (key, created, value) VALUES (?, ?, ?)",
+                    (key, now, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)),
+                )
+                db.commit()
+
+    def _remember(self, key: str, created: float, result) -> None:
+        self._memory[key] = (created, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def prune(self) -> int:
+        """Deletes expired rows from the SQLite tier. Returns the number removed."""
+        db = self._db()
+        if db is None or self.ttl is None:
+            return 0
+        with self._lock:
+            cur = db.execute("DELETE FROM audit_cache WHERE created < ?", (time.time() - self.ttl,))
+            db.commit()
+            return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM audit_cache")
+                db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._memory),
+        }
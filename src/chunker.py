@@ -0,0 +1,228 @@
+import mmap
+import os
+import re
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Offset-based chunking.
+#
+# A document is split into units (paragraphs, sentences or whitespace
+# tokens), and consecutive units are grouped into windows of `size` units
+# that share `overlap` units with the previous window. Chunks are
+# (start, end) offsets into one source buffer -- a str, bytes, or a
+# memory-mapped file -- and a chunk's string is only built when it is read.
+#
+#   paragraph  units separated by a blank line ("\n\n"), stripped; with the
+#              default size=1 this is exactly
+#              [c.strip() for c in text.split("\n\n") if c.strip()]
+#   sentence   runs ending in . ! or ? followed by whitespace
+#   token      whitespace-separated tokens
+#
+# For bytes / mmap sources offsets are byte offsets and only ASCII whitespace
+# is stripped. iter_chunks() does the same over an iterable of text pieces
+# (a file read in blocks, a generator) without holding the whole input.
+
+Span = Tuple[int, int]
+Buffer = Union[str, bytes, bytearray, mmap.mmap]
+
+STRATEGIES = ("paragraph", "sentence", "token")
+DEFAULT_SIZES = {"paragraph": 1, "sentence": 5, "token": 200}
+
+_TEXT_PATTERNS = {
+    "sentence": re.compile(r"\S.*?(?:[.!?](?=\s)|\Z)", re.S),
+    "token": re.compile(r"\S+"),
+}
+_BYTES_PATTERNS = {
+    "sentence": re.compile(rb"\S.*?(?:[.!?](?=\s)|\Z)", re.S),
+    "token": re.compile(rb"\S+"),
+}
+
+
+def _is_text(buf) -> bool:
+    return isinstance(buf, str)
+
+
+def _window_params(strategy: str, size: Optional[int], overlap: int) -> Tuple[int, int]:
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown chunking strategy {strategy!r}; expected one of {STRATEGIES}")
+    if size is None:
+        size = DEFAULT_SIZES[strategy]
+    if size < 1:
+        raise ValueError("size must be >= 1")
+    if not 0 <= overlap < size:
+        raise ValueError("overlap must be >= 0 and smaller than size")
+    return size, overlap
+
+
+def _paragraph_units(buf: Buffer, pos: int, end: int) -> Iterator[Span]:
+    sep = "\n\n" if _is_text(buf) else b"\n\n"
+    ws = str.isspace if _is_text(buf) else (lambda c: c in b" \t\n\r\x0b\x0c")
+    while True:
+        nxt = buf.find(sep, pos, end)
+        stop = end if nxt == -1 else nxt
+        # Strip in place: walk the offsets instead of slicing the piece
+        a, b = pos, stop
+        while a < b and ws(buf[a]):
+            a += 1
+        while b > a and ws(buf[b - 1]):
+            b -= 1
+        if a < b:
+            yield a, b
+        if nxt == -1:
+            return
+        pos = nxt + 2
+
+
+def iter_units(buf: Buffer, strategy: str = "paragraph", pos: int = 0, end: Optional[int] = None) -> Iterator[Span]:
+    """Unit spans of buf[pos:end] for the given strategy."""
+    if end is None:
+        end = len(buf)
+    if strategy == "paragraph":
+        return _paragraph_units(buf, pos, end)
+    patterns = _TEXT_PATTERNS if _is_text(buf) else _BYTES_PATTERNS
+    return (m.span() for m in patterns[strategy].finditer(buf, pos, end))
+
+
+def _windows(units: Iterable[Span], size: int, overlap: int, retain=None) -> Iterator[Span]:
+    # retain(first_start or None) is told the earliest offset still needed
+    # before the next unit is pulled
+    window = deque()
+    step = size - overlap
+    emitted = False
+    for unit in units:
+        window.append(unit)
+        if len(window) == size:
+            yield window[0][0], window[-1][1]
+            emitted = True
+            for _ in range(step):
+                window.popleft()
+        if retain is not None:
+            retain(window[0][0] if window else None)
+    # Trailing partial window, unless everything in it was already emitted
+    if window and (not emitted or len(window) > overlap):
+        yield window[0][0], window[-1][1]
+
+
+def iter_chunk_spans(buf: Buffer, strategy: str = "paragraph", size: Optional[int] = None,
+                     overlap: int = 0) -> Iterator[Span]:
+    """Yields (start, end) offsets of each chunk of `buf`."""
+    size, overlap = _window_params(strategy, size, overlap)
+    return _windows(iter_units(buf, strategy), size, overlap)
+
+
+def chunk_spans(buf: Buffer, strategy: str = "paragraph", size: Optional[int] = None,
+                overlap: int = 0) -> List[Span]:
+    return list(iter_chunk_spans(buf, strategy, size, overlap))
+
+
+def span_text(buf: Buffer, span: Span, encoding: str = "utf-8") -> str:
+    """Builds the string of one chunk."""
+    start, end = span
+    piece = buf[start:end]
+    if isinstance(piece, str):
+        return piece
+    return piece.decode(encoding, errors="replace")
+
+
+def map_file(path: str) -> Buffer:
+    """Read-only memory map of a file (empty files map to b"")."""
+    if os.path.getsize(path) == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ChunkedDocument(Sequence):
+    """
+    Chunk spans over one source buffer. Indexing builds that chunk's string;
+    nothing else is copied out of the buffer.
+    """
+
+    def __init__(self, source: Buffer, strategy: str = "paragraph", size: Optional[int] = None,
+                 overlap: int = 0, encoding: str = "utf-8"):
+        self.source = source
+        self.encoding = encoding
+        self.spans: List[Span] = chunk_spans(source, strategy, size, overlap)
+
+    @classmethod
+    def from_file(cls, path: str, strategy: str = "paragraph", size: Optional[int] = None,
+                  overlap: int = 0, encoding: str = "utf-8") -> "ChunkedDocument":
+        """Chunks a text file through a memory map instead of reading it in."""
+        return cls(map_file(path), strategy, size, overlap, encoding)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [span_text(self.source, s, self.encoding) for s in self.spans[index]]
+        return span_text(self.source, self.spans[index], self.encoding)
+
+    def close(self) -> None:
+        if isinstance(self.source, mmap.mmap):
+            self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _StreamBuffer:
+    """Sliding text buffer over a piece iterator, addressed by global offsets."""
+
+    def __init__(self, pieces: Iterable[str], strategy: str):
+        self.pieces = pieces
+        self.strategy = strategy
+        self.buf = ""
+        self.base = 0           # global offset of buf[0]
+        self.keep_from = None   # earliest global offset still needed by the caller
+
+    def text(self, start: int, end: int) -> str:
+        return self.buf[start - self.base:end - self.base]
+
+    def units(self) -> Iterator[Span]:
+        resume = 0  # global offset scanning continues from
+        for piece in self.pieces:
+            if not piece:
+                continue
+            keep = resume if self.keep_from is None else min(resume, self.keep_from)
+            self.buf = self.buf[keep - self.base:] + piece
+            self.base = keep
+
+            found = list(iter_units(self.buf, self.strategy, resume - self.base))
+            # The last unit may continue in the next piece; rescan it then
+            for a, b in found[:-1]:
+                resume = b + self.base
+                yield a + self.base, resume
+        for a, b in iter_units(self.buf, self.strategy, resume - self.base):
+            yield a + self.base, b + self.base
+
+
+def iter_chunks(pieces: Iterable[str], strategy: str = "paragraph", size: Optional[int] = None,
+                overlap: int = 0) -> Iterator[Tuple[int, int, str]]:
+    """
+    Streams (start, end, text) chunks from an iterable of text pieces, e.g.
+    a generator or a file read in blocks. Offsets are into the concatenated
+    input; only the text of the current window is held in memory. The chunks
+    are the same as chunking "".join(pieces) in one go.
+    """
+    size, overlap = _window_params(strategy, size, overlap)
+    stream = _StreamBuffer(pieces, strategy)
+
+    def retain(offset):
+        stream.keep_from = offset
+
+    for start, end in _windows(stream.units(), size, overlap, retain):
+        yield start, end, stream.text(start, end)
+
+
+def iter_file_pieces(path: str, block_size: int = 1 << 20, encoding: str = "utf-8") -> Iterator[str]:
+    """Reads a text file in blocks (multi-byte characters are never split)."""
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
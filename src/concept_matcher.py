@@ -0,0 +1,95 @@
+import re
+from typing import Dict, Iterator, List, Set, Tuple
+
+# Multi-concept matcher for compute_coverage.
+#
+# All query concepts are compiled into one regex: a lookahead over the
+# alternation of all patterns, longest first, so a single finditer pass
+# reports at every position the longest concept starting there. Every other
+# concept starting at that position is a prefix of it, so those are looked up
+# in a precomputed prefix table instead of rescanned. The text is walked once,
+# but re's backtracking engine tries the alternatives at each position, so the
+# pass costs O(len(text) * k) character comparisons in the worst case for k
+# concepts (in practice far less: most positions fail on the first character).
+# That replaces k separate Python-level scans and is what scan() and
+# iter_matches() use.
+#
+# Presence checks (found) need no positions or counts: they use one C
+# substring search per distinct concept, each stopping at its first hit. For
+# the handful of concepts a query yields that is k fast passes at worst and
+# usually beats the regex pass.
+#
+# Matching runs on the same " ".join(chunks).lower() text the original
+# coverage check used, so a concept spanning two adjacent chunks still counts
+# (it is attributed to the chunk it starts in).
+
+
+class ConceptMatcher:
+    """Finds every occurrence of a fixed set of concepts in lowercase text."""
+
+    def __init__(self, concepts: List[str]):
+        self.concepts = list(concepts)
+        self.patterns = [c.lower() for c in self.concepts]
+        self._regex = None
+        if any(self.patterns):
+            distinct = sorted({p for p in self.patterns if p}, key=len, reverse=True)
+            self._regex = re.compile("(?=(" + "|".join(re.escape(p) for p in distinct) + "))")
+            by_pattern: Dict[str, List[int]] = {}
+            for idx, pattern in enumerate(self.patterns):
+                if pattern:
+                    by_pattern.setdefault(pattern, []).append(idx)
+            self._by_pattern = by_pattern
+            # Longest pattern matched at a position -> (length, concept index)
+            # of every pattern matching there, i.e. of all its prefixes
+            self._prefixes = {
+                p: [(len(q), idx) for q in distinct if p.startswith(q) for idx in by_pattern[q]]
+                for p in distinct
+            }
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yields (concept_index, start, end) for every (possibly overlapping) occurrence."""
+        if self._regex is not None:
+            prefixes = self._prefixes
+            for m in self._regex.finditer(text):
+                start = m.start()
+                for length, idx in prefixes[m.group(1)]:
+                    yield idx, start, start + length
+
+    def scan(self, chunk_lowers: List[str]) -> Dict[int, Dict[int, int]]:
+        """
+        Matches all concepts against the chunks in one pass over their joined text.
+        Returns {concept_index: {chunk_index: occurrences}} for found concepts.
+        """
+        starts = []
+        offset = 0
+        for lower in chunk_lowers:
+            starts.append(offset)
+            offset += len(lower) + 1  # joining space
+        text = " ".join(chunk_lowers)
+
+        hits: Dict[int, Dict[int, int]] = {}
+        if self._regex is None:
+            return hits
+        # Matches arrive in text order: walk the chunk starts alongside
+        prefixes = self._prefixes
+        chunk_idx = 0
+        last = len(starts) - 1
+        for m in self._regex.finditer(text):
+            start = m.start()
+            while chunk_idx < last and starts[chunk_idx + 1] <= start:
+                chunk_idx += 1
+            for _, idx in prefixes[m.group(1)]:
+                per_chunk = hits.setdefault(idx, {})
+                per_chunk[chunk_idx] = per_chunk.get(chunk_idx, 0) + 1
+        return hits
+
+    def found(self, chunk_lowers: List[str]) -> Set[int]:
+        """
+        Indices of the concepts occurring anywhere in the joined chunks. Unlike
+        scan() this does not count occurrences: one substring search per
+        distinct concept, stopping at its first hit.
+        """
+        if self._regex is None:
+            return set()
+        text = " ".join(chunk_lowers)
+        return {idx for pattern, indices in self._by_pattern.items() if pattern in text for idx in indices}
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.metrics import TextLike
+from src.text_utils import analyze
+
+# Knowledge-base term statistics for IDF-weighted relevance (BM25 / TF-IDF).
+#
+# The overlap metric in metrics.compute_relevance counts "the" as much as
+# "reranker". CorpusStats records, once per knowledge base, how many documents
+# contain each term and the total document length, so relevance can weight
+# query terms by rarity and normalize for chunk length.
+#
+# Terms are stored as 64-bit BLAKE2b hashes in a sorted uint64 array with a
+# parallel document-frequency array: lookups are one np.searchsorted for all
+# query terms, and save() / load() are two .npy files plus a JSON header that
+# load() memory-maps, so opening an index of millions of terms takes
+# milliseconds. Documents added after a load are kept in a small pending
+# table and merged into the sorted arrays on the next lookup or save.
+#
+# Both metrics score in [0, 1] like the overlap metric: the IDF-weighted
+# fraction of query terms a chunk contains. "tfidf" counts a term as present
+# or absent; "bm25" applies BM25 term-frequency saturation and length
+# normalization, scaled so one occurrence in an average-length chunk counts
+# fully and capped at 1. With no documents indexed every term has the same
+# IDF and there is no average length to normalize against, so both reduce to
+# the overlap metric and a chunk's score never depends on the other chunks.
+
+METRICS = ("bm25", "tfidf")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+FORMAT_VERSION = 1
+
+
+def term_hash(term: str) -> int:
+    """Stable 64-bit id of a term, the key of every on-disk term table."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def hash_terms(terms: Iterable[str]) -> np.ndarray:
+    return np.fromiter((term_hash(t) for t in terms), dtype=np.uint64)
+
+
+class CorpusStats:
+    """
+    Document frequencies and lengths of a knowledge base.
+
+    stats = CorpusStats()
+    stats.add_documents(kb_chunks)
+    stats.save("kb-stats")
+    auditor = IntegrityAuditor(corpus_stats=CorpusStats.load("kb-stats"))
+    auditor.relevance_metric = "bm25"
+    """
+
+    def __init__(self):
+        self.doc_count = 0
+        self.total_length = 0
+        self._hashes = np.empty(0, dtype=np.uint64)   # sorted
+        self._df = np.empty(0, dtype=np.int64)
+        self._pending: Dict[int, int] = {}            # term hash -> df added since last merge
+        self._digest: Optional[str] = None
+        self._path: Optional[str] = None              # directory the tables are memory-mapped from
+
+    def __len__(self) -> int:
+        """Number of distinct terms."""
+        self._merge()
+        return len(self._hashes)
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+
+    def fingerprint(self) -> str:
+        """Digest of the statistics, computed once per change. Part of the audit cache key."""
+        if self._digest is None:
+            self._merge()
+            h = hashlib.sha256(f"{self.doc_count}:{self.total_length}".encode("ascii"))
+            h.update(np.ascontiguousarray(self._hashes, dtype="<u8").tobytes())
+            h.update(np.ascontiguousarray(self._df, dtype="<i8").tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    # Pool workers re-open the memory-mapped tables instead of receiving a pickled copy
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._path is not None and not self._pending and isinstance(self._hashes, np.memmap):
+            del state["_hashes"], state["_df"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "_hashes" not in state:
+            self._hashes = np.load(os.path.join(self._path, "terms.npy"), mmap_mode="r")
+            self._df = np.load(os.path.join(self._path, "df.npy"), mmap_mode="r")
+
+    # --- Building ---
+
+    def add_document(self, text: TextLike) -> None:
+        analyzed = analyze(text)
+        pending = self._pending
+        for tok in analyzed.tokens:
+            key = term_hash(tok)
+            pending[key] = pending.get(key, 0) + 1
+        self.doc_count += 1
+        self.total_length += analyzed.token_length
+        self._digest = None
+
+    def add_documents(self, texts: Iterable[TextLike]) -> None:
+        """Adds documents incrementally; existing statistics are kept."""
+        for text in texts:
+            self.add_document(text)
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+        keys = np.fromiter(self._pending.keys(), dtype=np.uint64, count=len(self._pending))
+        counts = np.fromiter(self._pending.values(), dtype=np.int64, count=len(self._pending))
+        merged, inverse = np.unique(np.concatenate([self._hashes, keys]), return_inverse=True)
+        self._df = np.bincount(inverse, weights=np.concatenate([self._df, counts]),
+                               minlength=len(merged)).astype(np.int64)
+        self._hashes = merged
+        self._pending = {}
+
+    # --- Lookup ---
+
+    def document_frequencies(self, terms: Sequence[str]) -> np.ndarray:
+        """Number of documents containing each term (0 for unseen terms)."""
+        self._merge()
+        hashes = hash_terms(terms)
+        pos = np.searchsorted(self._hashes, hashes)
+        pos_clipped = np.minimum(pos, max(len(self._hashes) - 1, 0))
+        df = np.zeros(len(hashes), dtype=np.int64)
+        if len(self._hashes):
+            found = self._hashes[pos_clipped] == hashes
+            df[found] = self._df[pos_clipped[found]]
+        return df
+
+    def idf(self, terms: Sequence[str], metric: str = "bm25") -> np.ndarray:
+        """Inverse document frequency per term; always positive, so unseen terms weigh most."""
+        df = self.document_frequencies(terms).astype(np.float64)
+        n = float(self.doc_count)
+        if metric == "bm25":
+            return np.log1p((n - df + 0.5) / (df + 0.5))
+        if metric == "tfidf":
+            return np.log((1.0 + n) / (1.0 + df)) + 1.0
+        raise ValueError(f"Unknown relevance metric: {metric!r} (expected one of {METRICS})")
+
+    # --- Scoring ---
+
+    def relevance(self, query: TextLike, chunks: List[TextLike], metric: str = "bm25",
+                  k1: float = BM25_K1, b: float = BM25_B) -> List[float]:
+        """
+        IDF-weighted relevance of each chunk to the query, in [0, 1].
+        Drop-in for metrics.compute_relevance; see the module comment for the formulas.
+        """
+        q_terms = sorted(analyze(query).tokens)
+        if not q_terms or not chunks:
+            return [0.0] * len(chunks)
+        idf = self.idf(q_terms, metric)
+
+        texts = [analyze(c) for c in chunks]
+        tf = np.array([[t.term_counts.get(term, 0) for term in q_terms] for t in texts], dtype=np.float64)
+        if metric == "tfidf":
+            weights = (tf > 0).astype(np.float64)
+        else:
+            if self.avg_length:
+                lengths = np.array([t.token_length for t in texts], dtype=np.float64)
+                norm = k1 * (1.0 - b + b * lengths / self.avg_length)
+            else:
+                # No corpus lengths: skip length normalization rather than
+                # normalizing against whichever chunks are being scored
+                norm = np.full(len(texts), k1)
+            weights = np.minimum(1.0, tf * (k1 + 1.0) / (tf + norm[:, None]))
+        return (weights @ idf / idf.sum()).tolist()
+
+    # --- Persistence ---
+
+    def save(self, path: str) -> None:
+        """Writes the statistics as terms.npy / df.npy plus meta.json."""
+        self._merge()
+        os.makedirs(path, exist_ok=True)
+        for name, array in (("terms.npy", self._hashes), ("df.npy", self._df)):
+            # Never truncate a file that live memory maps (maybe our own) point into
+            tmp = os.path.join(path, name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, os.path.join(path, name))
+        meta = {"version": FORMAT_VERSION, "doc_count": self.doc_count, "total_length": self.total_length,
+                "terms": len(self._hashes), "digest": self.fingerprint()}
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CorpusStats":
+        """Opens saved statistics; with mmap=True the term tables stay on disk until touched."""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported corpus stats version: {meta.get('version')}")
+
+        stats = cls()
+        mode = "r" if mmap else None
+        stats._hashes = np.load(os.path.join(path, "terms.npy"), mmap_mode=mode)
+        stats._df = np.load(os.path.join(path, "df.npy"), mmap_mode=mode)
+        stats.doc_count = meta["doc_count"]
+        stats.total_length = meta["total_length"]
+        stats._digest = meta.get("digest")
+        if mmap:
+            stats._path = path
+        return stats
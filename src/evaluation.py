@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src import metrics, text_utils, vectorized
+
+# Many queries against one shared pool of candidate chunks (retrieval
+# evaluation).
+#
+# Auditing each query's top-k separately re-lexes the pool for every query and
+# recomputes similarities between chunks that appear in many top-k lists.
+# PoolEvaluator lexes the pool and builds its token matrix once. For a block
+# of queries it computes the whole query x chunk overlap matrix in one sparse
+# product (scipy), or one vectorized row per query without scipy. It computes
+# the pool's pairwise Jaccard matrix once (up to max_dense_pool chunks; larger
+# pools cache each pair the first time a top-k list needs it). Each query's
+# audit is then assembled from slices of those matrices plus a coverage scan
+# of its k chunks.
+#
+# Each result equals IntegrityAuditor.audit(query, <the selected chunks>)
+# bit for bit, except that redundancy is always exact: it never switches to the sampled estimate. The auditor's result cache
+# and instrumentation are not used.
+
+
+@dataclass
+class PoolAudit:
+    query: str
+    indices: List[int]          # Pool positions of the query's top-k, most relevant first
+    result: Any                 # AuditResult of those chunks, in that order
+
+
+class PoolEvaluator:
+    """
+    Args:
+        auditor: Configured IntegrityAuditor (weights, relevance metric, thresholds)
+        pool: Candidate chunks shared by every query
+        chunk_ids: Optional ids for the auditor's feature store
+        max_dense_pool: Largest pool whose full similarity matrix is precomputed
+    """
+
+    def __init__(self, auditor, pool: Sequence[str], chunk_ids: Optional[Sequence[Hashable]] = None,
+                 max_dense_pool: int = 4096):
+        self.auditor = auditor
+        self.pool = list(pool)
+        self.texts = auditor.analyze_chunks(self.pool, chunk_ids)
+        self.matrix = vectorized.TokenMatrix(self.texts) if vectorized.HAS_NUMPY and self.texts else None
+        self.max_dense_pool = max_dense_pool
+        self._similarity: Optional[np.ndarray] = None
+        self._pair_cache: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.pool)
+
+    # --- Relevance ---
+
+    def relevance_matrix(self, queries: Sequence[str]) -> np.ndarray:
+        """len(queries) x len(pool) relevance under the auditor's metric."""
+        query_texts = [text_utils.analyze(q) for q in queries]
+        out = np.zeros((len(query_texts), len(self.pool)), dtype=np.float64)
+        if not self.pool:
+            return out
+        if self.auditor.relevance_metric != "overlap":
+            for row, query_text in enumerate(query_texts):
+                out[row] = self.auditor.compute_relevance(query_text, self.texts)
+            return out
+        if vectorized.sp is None:
+            for row, query_text in enumerate(query_texts):
+                out[row] = self.matrix.relevance(query_text)
+            return out
+
+        # Overlap counts for every query in one sparse product
+        vocab = self.matrix.vocab
+        rows, cols = [], []
+        q_sizes = np.zeros(len(query_texts), dtype=np.float64)
+        for row, query_text in enumerate(query_texts):
+            q_sizes[row] = len(query_text.tokens)
+            for tok in query_text.tokens:
+                idx = vocab.get(tok)
+                if idx is not None:
+                    rows.append(row)
+                    cols.append(idx)
+        sp = vectorized.sp
+        queries_m = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(query_texts), len(vocab)))
+        pool_m = sp.csr_matrix((np.ones(len(self.matrix.indices)), self.matrix.indices, self.matrix.indptr),
+                               shape=(len(self.pool), len(vocab)))
+        counts = (queries_m @ pool_m.T).toarray()
+        np.divide(counts, q_sizes[:, None], out=out, where=q_sizes[:, None] > 0)
+        return out
+
+    # --- Pool similarity ---
+
+    def similarity_matrix(self) -> Optional[np.ndarray]:
+        """Full pool x pool Jaccard matrix, computed once; None above max_dense_pool or without numpy."""
+        if self._similarity is None and self.matrix is not None and len(self.pool) <= self.max_dense_pool \
+                and self.matrix.supports_pairwise():
+            sim = np.empty((len(self.pool), len(self.pool)), dtype=np.float64)
+            for start, block in self.matrix.jaccard_blocks():
+                sim[start:start + len(block)] = block
+            self._similarity = sim
+        return self._similarity
+
+    def _subset_pairs(self, indices: List[int]) -> List[List[float]]:
+        """Pairwise similarity among the pool chunks at `indices`."""
+        sim = self.similarity_matrix()
+        if sim is not None:
+            return sim[np.ix_(indices, indices)].tolist()
+        n = len(self.pool)
+        cache = self._pair_cache
+        out = [[0.0] * len(indices) for _ in indices]
+        for a, i in enumerate(indices):
+            for b in range(a + 1, len(indices)):
+                j = indices[b]
+                key = i * n + j if i < j else j * n + i
+                s = cache.get(key)
+                if s is None:
+                    s = cache[key] = metrics.token_jaccard(self.texts[i].tokens, self.texts[j].tokens)
+                out[a][b] = out[b][a] = s
+        return out
+
+    # --- Audits ---
+
+    def _audit_selection(self, query: str, indices: List[int], relevance: List[float],
+                         score_only: bool):
+        auditor = self.auditor
+        concepts = text_utils.extract_key_concepts(query)
+        coverage_data = metrics.compute_coverage(concepts, [self.texts[i] for i in indices], detail=not score_only)
+
+        k = len(indices)
+        pairs = self._subset_pairs(indices)
+        pairwise_scores = []
+        near_duplicates = []
+        for a in range(k):
+            for b in range(a + 1, k):
+                s = pairs[a][b]
+                pairwise_scores.append(s)
+                if not score_only and s > auditor.duplicate_threshold:
+                    near_duplicates.append((a, b, s))
+        # Same pair order and reduction as metrics.redundancy_details
+        redundancy = max(0.0, min(1.0, sum(pairwise_scores) / len(pairwise_scores))) if pairwise_scores else 0.0
+        return auditor.build_result(relevance, coverage_data, redundancy, score_only, near_duplicates)
+
+    def iter_evaluate(self, queries: Iterable[str], top_k: int = 10, score_only: Optional[bool] = None,
+                      query_block: int = 256) -> Iterator[PoolAudit]:
+        """
+        Yields a PoolAudit per query, in input order: the query's top_k pool
+        chunks by relevance (ties keep pool order) and the audit of that list.
+        Queries are scored `query_block` at a time to bound the relevance matrix.
+        """
+        if score_only is None:
+            score_only = self.auditor.score_only
+        queries = iter(queries)
+        while True:
+            block = []
+            for query in queries:
+                block.append(query)
+                if len(block) == query_block:
+                    break
+            if not block:
+                return
+            relevance = self.relevance_matrix(block)
+            k = min(top_k, len(self.pool))
+            ranked = np.argsort(-relevance, axis=1, kind="stable")[:, :k]
+            for row, query in enumerate(block):
+                if not query or k <= 0:
+                    yield PoolAudit(query, [], self.auditor.build_empty_result())
+                    continue
+                indices = ranked[row].tolist()
+                scores = relevance[row, indices].tolist()
+                yield PoolAudit(query, indices, self._audit_selection(query, indices, scores, score_only))
+            if len(block) < query_block:
+                return
+
+    def evaluate(self, queries: Iterable[str], top_k: int = 10, score_only: Optional[bool] = None) -> List[PoolAudit]:
+        """List form of iter_evaluate."""
+        return list(self.iter_evaluate(queries, top_k, score_only))
@@ -19,8 +19,14 @@ def generate_audit_explanation(score: float, status: str,
         
     # 2. Missing Concepts
     missing = coverage_data.get("missing", [])
+    # Present when a knowledge-base index was probed: concept -> documents containing it
+    corpus_matches = coverage_data.get("corpus_matches")
+    retrieval_misses = [c for c in missing if corpus_matches and corpus_matches.get(c)]
+    corpus_gaps = [c for c in missing if c not in retrieval_misses]
     if missing:
         missing_text = f"The following key concepts are missing: **{', '.join(missing)}**."
+        if retrieval_misses:
+            missing_text += f" The knowledge base does cover **{', '.join(retrieval_misses)}**, so these are retrieval misses."
     else:
         missing_text = "All key concepts from the query appear to be covered."
         
@@ -37,8 +43,10 @@ def generate_audit_explanation(score: float, status: str,
     avg_relevance = sum(relevance_scores) / len(relevance_scores) if relevance_scores else 0
     if avg_relevance < 0.6:
         tips.append("Try refining the query to be more specific.")
-    if missing:
-        tips.append(f"Ensure the database contains documents about '{missing[0]}'.")
+    if retrieval_misses:
+        tips.append(f"'{retrieval_misses[0]}' is in the knowledge base but was not retrieved; check the retriever or raise 'top_k'.")
+    if corpus_gaps:
+        tips.append(f"Ensure the database contains documents about '{corpus_gaps[0]}'.")
     if redundancy_score > 0.3:
         tips.append("Reduce 'top_k' or apply Maximal Marginal Relevance (MMR) reranking.")
         
@@ -51,3 +59,70 @@ def generate_audit_explanation(score: float, status: str,
         "redundancy_note": redundancy_text,
         "improvement_tip": " ".join(tips)
     }
+
+EXPLANATION_KEYS = ("summary", "missing_concepts", "redundancy_note", "improvement_tip")
+
+class LazyExplanation(dict):
+    """
+    Explanation dict that calls generate_audit_explanation the first time it
+    is read. Gating paths that only look at the score never pay for the
+    string formatting. It is a real dict, so json.dumps, dataclasses.asdict
+    and isinstance(..., dict) work as before; every dict method fills it first.
+    """
+    
+    __slots__ = ("_args",)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._args = None
+        
+    @classmethod
+    def deferred(cls, score: float, status: str, relevance_scores: List[float],
+                 coverage_data: Dict, redundancy_score: float) -> "LazyExplanation":
+        # Holds the final keys from the start: json's C encoder writes an
+        # empty dict as {} without calling items()
+        explanation = cls.fromkeys(EXPLANATION_KEYS)
+        explanation._args = (score, status, relevance_scores, coverage_data, redundancy_score)
+        return explanation
+        
+    def _materialize(self) -> None:
+        if self._args is not None:
+            args, self._args = self._args, None
+            dict.update(self, generate_audit_explanation(*args))
+            
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, LazyExplanation):
+            other._materialize()
+        return dict.__eq__(self, other)
+        
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+        
+    __hash__ = None
+    
+    def __reduce__(self):
+        # Unpickles as a plain dict once computed, otherwise stays lazy
+        if self._args is None:
+            return (dict, (dict(self),))
+        return (LazyExplanation.deferred, self._args)
+
+
+def _filled_first(name):
+    method = getattr(dict, name)
+    
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+
+# json's encoder and dict(...) go through items() / keys() / __iter__ for dict
+# subclasses, so wrapping these covers them too
+for _name in ("__getitem__", "__iter__", "__len__", "__contains__", "__repr__", "__or__", "__ror__",
+              "__ior__", "__setitem__", "__delitem__", "get", "keys", "items", "values", "copy",
+              "update", "pop", "popitem", "setdefault", "clear"):
+    setattr(LazyExplanation, _name, _filled_first(_name))
+del _name
@@ -0,0 +1,154 @@
+import hashlib
+import itertools
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence
+
+from src.metrics import token_jaccard
+from src.text_utils import AnalyzedText
+
+# Chunk-level feature store shared across audits.
+#
+# Knowledge-base chunks recur across many queries' result sets. The store
+# keeps each chunk's analysis (lowercased text, token set) once, keyed by an
+# external chunk ID or a content hash, and caches the Jaccard similarity of
+# chunk pairs that keep co-occurring. Both tables are bounded: chunks are
+# evicted LRU, pair entries oldest-first.
+#
+# The pair cache pays off on the pure-Python redundancy path (small lists, or
+# no numpy). For larger lists the vectorized matrix is faster than per-pair
+# dict lookups, so there the store only saves the re-tokenization.
+
+
+class ChunkFeatures(AnalyzedText):
+    """AnalyzedText plus the store-assigned integer id used for pair keys."""
+
+    def __init__(self, text: str, uid: int):
+        super().__init__(text)
+        self.uid = uid
+        self.length = len(text)
+
+
+def content_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class ChunkFeatureStore:
+    """
+    Args:
+        max_chunks: Chunk analyses kept (LRU)
+        max_pairs: Cached pair similarities kept
+        pair_min_count: Co-occurrences before a pair's similarity is cached
+    """
+
+    def __init__(self, max_chunks: int = 100_000, max_pairs: int = 1_000_000, pair_min_count: int = 2):
+        self.max_chunks = max_chunks
+        self.max_pairs = max_pairs
+        self.pair_min_count = pair_min_count
+        self._init_tables()
+
+    def _init_tables(self) -> None:
+        self._chunks: "OrderedDict[Hashable, ChunkFeatures]" = OrderedDict()
+        self._pairs: Dict[int, float] = {}
+        self._pair_counts: Dict[int, int] = {}
+        # uids are never reused, so entries for evicted chunks can only go stale, never wrong
+        self._uids = itertools.count()
+        self.chunk_hits = 0
+        self.chunk_misses = 0
+        self.pair_hits = 0
+        self.pair_misses = 0
+
+    # Pool workers get the configuration and build their own (warm) tables
+    # instead of receiving a pickled copy of a potentially large store
+    def __getstate__(self):
+        return {"max_chunks": self.max_chunks, "max_pairs": self.max_pairs, "pair_min_count": self.pair_min_count}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_tables()
+
+    # --- Chunks ---
+
+    def get(self, text: str, chunk_id: Optional[Hashable] = None) -> ChunkFeatures:
+        """Returns the cached analysis of a chunk, analyzing it on first sight."""
+        key = chunk_id if chunk_id is not None else content_key(text)
+        features = self._chunks.get(key)
+        if features is not None and (chunk_id is None or features.text == text):
+            self._chunks.move_to_end(key)
+            self.chunk_hits += 1
+            return features
+
+        # New chunk, or an external ID whose content changed
+        self.chunk_misses += 1
+        features = ChunkFeatures(text, next(self._uids))
+        self._chunks[key] = features
+        if len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+        return features
+
+    def analyze_all(self, chunks: Sequence[str], chunk_ids: Optional[Sequence[Hashable]] = None) -> List[ChunkFeatures]:
+        if chunk_ids is None:
+            return [self.get(c) for c in chunks]
+        return [self.get(c, cid) for c, cid in zip(chunks, chunk_ids)]
+
+    # --- Pairs ---
+
+    def _trim_pairs(self) -> None:
+        # Drop the oldest half; dicts keep insertion order
+        for table in (self._pairs, self._pair_counts):
+            if len(table) > self.max_pairs:
+                for key in list(itertools.islice(table, len(table) // 2)):
+                    del table[key]
+
+    def redundancy(self, chunks: List[ChunkFeatures]) -> float:
+        """
+        Same as metrics.compute_redundancy, reusing cached pair similarities
+        and caching pairs that have co-occurred pair_min_count times.
+        """
+        return self.redundancy_details(chunks)["score"]
+
+    def redundancy_details(self, chunks: List[ChunkFeatures], duplicate_threshold: Optional[float] = None) -> Dict:
+        """Same as metrics.redundancy_details, through the pair cache."""
+        n = len(chunks)
+        near_duplicates = []
+        if n < 2:
+            return {"score": 0.0, "near_duplicates": near_duplicates}
+
+        pairs = self._pairs
+        counts = self._pair_counts
+        min_count = self.pair_min_count
+        pairwise_scores = []
+        for i in range(n):
+            a = chunks[i]
+            for j in range(i + 1, n):
+                b = chunks[j]
+                lo, hi = (a.uid, b.uid) if a.uid < b.uid else (b.uid, a.uid)
+                key = (lo << 32) | hi  # unique while fewer than 2**32 chunks were ever stored
+                sim = pairs.get(key)
+                if sim is None:
+                    self.pair_misses += 1
+                    sim = token_jaccard(a.tokens, b.tokens)
+                    seen = counts.get(key, 0) + 1
+                    if seen >= min_count:
+                        pairs[key] = sim
+                        counts.pop(key, None)
+                    else:
+                        counts[key] = seen
+                else:
+                    self.pair_hits += 1
+                pairwise_scores.append(sim)
+                if duplicate_threshold is not None and sim > duplicate_threshold:
+                    near_duplicates.append((i, j, sim))
+
+        self._trim_pairs()
+        avg_redundancy = sum(pairwise_scores) / len(pairwise_scores)
+        return {"score": max(0.0, min(1.0, avg_redundancy)), "near_duplicates": near_duplicates}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chunks": len(self._chunks),
+            "chunk_hits": self.chunk_hits,
+            "chunk_misses": self.chunk_misses,
+            "pairs": len(self._pairs),
+            "pair_hits": self.pair_hits,
+            "pair_misses": self.pair_misses,
+        }
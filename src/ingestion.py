@@ -0,0 +1,185 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+# Document ingestion for uploaded files (PDF / plain text).
+#
+# Extracted page text is cached by a SHA-256 of the file bytes, so a
+# Streamlit rerun (or the same manual uploaded twice) never re-parses the
+# PDF. On a miss, pages are extracted across a process pool in page ranges
+# and streamed back in order: iter_pages() yields page 1 as soon as it is
+# ready, so chunking and auditing can start before the last page is parsed.
+# Each worker opens the PDF once (pool initializer) and then only pays for
+# the pages it extracts.
+
+PDF_MIME = "application/pdf"
+
+_WORKER_READER = None
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_pdf(data: bytes, mime_type: Optional[str] = None) -> bool:
+    if mime_type is not None:
+        return mime_type == PDF_MIME
+    return data[:5] == b"%PDF-"
+
+
+def _open_reader(data: bytes):
+    import pypdf
+    return pypdf.PdfReader(io.BytesIO(data))
+
+
+def _init_reader(data: bytes) -> None:
+    global _WORKER_READER
+    _WORKER_READER = _open_reader(data)
+
+
+def _extract_range(start: int, stop: int) -> List[str]:
+    pages = _WORKER_READER.pages
+    return [pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(data: bytes, workers: Optional[int] = None, pages_per_task: int = 8,
+                   min_parallel_pages: int = 16, prefetch: int = 2) -> Iterator[str]:
+    """
+    Yields the text of each PDF page in order ("" for pages without text).
+
+    Args:
+        data: PDF file bytes
+        workers: Process count (defaults to os.cpu_count(); 1 extracts inline)
+        pages_per_task: Consecutive pages extracted per pool task
+        min_parallel_pages: Smaller documents are extracted inline
+        prefetch: Tasks kept in flight per worker
+    """
+    reader = _open_reader(data)
+    num_pages = len(reader.pages)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, max(1, num_pages // max(1, pages_per_task)))
+
+    if workers <= 1 or num_pages < min_parallel_pages:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    ranges = iter(range(0, num_pages, pages_per_task))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_reader, initargs=(data,)) as pool:
+        in_flight = deque()
+        try:
+            while True:
+                while len(in_flight) < workers * prefetch:
+                    start = next(ranges, None)
+                    if start is None:
+                        break
+                    in_flight.append(pool.submit(_extract_range, start, min(start + pages_per_task, num_pages)))
+                if not in_flight:
+                    break
+                yield from in_flight.popleft().result()
+        finally:
+            # Consumer stopped early (or failed): drop what has not started yet
+            for future in in_flight:
+                future.cancel()
+
+
+def decode_text(data: bytes) -> str:
+    return data.decode("utf-8")
+
+
+def join_pages(pages) -> str:
+    """Document text as app.py has always built it: each non-empty page followed by a newline."""
+    return "".join(page + "\n" for page in pages if page)
+
+
+class DocumentIngestor:
+    """
+    Cached, streaming text extraction.
+
+    Args:
+        max_entries: Documents kept in the cache (LRU)
+        max_chars: Total cached characters before older documents are evicted
+        workers: Processes used for PDF page extraction (None = os.cpu_count())
+    """
+
+    def __init__(self, max_entries: int = 32, max_chars: int = 50_000_000, workers: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.workers = workers
+        self._pages: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            pages = self._pages.get(key)
+            if pages is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return pages
+
+    def _store(self, key: str, pages: List[str]) -> None:
+        size = sum(len(p) for p in pages)
+        if size > self.max_chars:
+            return
+        with self._lock:
+            if key in self._pages:
+                return
+            self._pages[key] = pages
+            self._chars += size
+            while len(self._pages) > self.max_entries or self._chars > self.max_chars:
+                _, evicted = self._pages.popitem(last=False)
+                self._chars -= sum(len(p) for p in evicted)
+
+    def iter_pages(self, data: bytes, mime_type: Optional[str] = None) -> Iterator[str]:
+        """
+        Yields page texts (a text file is a single page). Cached documents are
+        replayed; otherwise pages stream as they are extracted and the document
+        is cached once it has been read to the end.
+        """
+        key = content_hash(data)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        if is_pdf(data, mime_type):
+            source = iter_pdf_pages(data, workers=self.workers)
+        else:
+            source = iter([decode_text(data)])
+
+        pages = []
+        for page in source:
+            pages.append(page)
+            yield page
+        self._store(key, pages)
+
+    def iter_text(self, data: bytes, mime_type: Optional[str] = None) -> Iterator[str]:
+        """
+        Streams the document text in pieces (one per page) whose concatenation
+        is extract_text(); feed it to chunker.iter_chunks to chunk while pages
+        are still being extracted.
+        """
+        if is_pdf(data, mime_type):
+            for page in self.iter_pages(data, mime_type):
+                if page:
+                    yield page + "\n"
+        else:
+            yield from self.iter_pages(data, mime_type)
+
+    def extract_text(self, data: bytes, mime_type: Optional[str] = None) -> str:
+        """Whole-document text."""
+        return "".join(self.iter_text(data, mime_type))
+
+    def stats(self):
+        with self._lock:
+            return {"documents": len(self._pages), "chars": self._chars, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+# Optional per-stage instrumentation for IntegrityAuditor.audit.
+#
+# Disabled (the default, auditor.instrumentation = None) the audit only pays
+# for a no-op context manager per stage. Enabled, every audit gets an
+# AuditTrace with wall and CPU time per stage plus chunk / token counts, which
+# can be attached to the AuditResult, passed to a callback, and/or recorded by
+# a MetricsCollector.
+#
+# The collector is process-wide (see get_collector()): it keeps cumulative
+# histograms for Prometheus text exposition and a bounded ring of recent
+# spans that can be written as a Chrome trace (chrome://tracing, Perfetto).
+# In batch / sidecar pool workers each process has its own collector; attach
+# traces to results and record them in the parent to aggregate.
+
+STAGES = ("analyze", "relevance", "concepts", "coverage", "redundancy")
+
+# Seconds; roughly log-spaced from 50us to 10s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CHUNK_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+NO_STAGE = nullcontext()
+
+
+class AuditTrace:
+    """Timings of one audit. Times are in seconds."""
+
+    __slots__ = ("start", "wall", "cpu", "stages", "chunk_count", "token_count", "cache_hit", "_t0", "_c0")
+
+    def __init__(self):
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._c0 = time.thread_time()
+        self.wall = 0.0
+        self.cpu = 0.0
+        # stage -> (start offset, wall, cpu)
+        self.stages: Dict[str, tuple] = {}
+        self.chunk_count = 0
+        self.token_count = 0
+        self.cache_hit = False
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        c0 = time.thread_time()
+        try:
+            yield
+        finally:
+            self.stages[name] = (t0 - self._t0, time.perf_counter() - t0, time.thread_time() - c0)
+
+    def finish(self) -> "AuditTrace":
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = time.thread_time() - self._c0
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "wall_ms": self.wall * 1000.0,
+            "cpu_ms": self.cpu * 1000.0,
+            "chunks": self.chunk_count,
+            "tokens": self.token_count,
+            "cache_hit": self.cache_hit,
+            "stages": {
+                name: {"wall_ms": wall * 1000.0, "cpu_ms": cpu * 1000.0}
+                for name, (_, wall, cpu) in self.stages.items()
+            },
+        }
+
+    def __getstate__(self):
+        return {s: getattr(self, s) for s in self.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def __repr__(self):
+        return f"AuditTrace(wall={self.wall * 1000:.2f}ms, chunks={self.chunk_count}, stages={list(self.stages)})"
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram (not thread-safe; the collector locks)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str = "") -> List[str]:
+        sep = "," if labels else ""
+        out = []
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {running}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum:.9g}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class MetricsCollector:
+    """
+    Aggregates AuditTraces.
+
+    Args:
+        max_spans: Recent audits kept for the JSON trace export
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self.max_spans = max_spans
+        self.reset()
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self.audit_wall = Histogram()
+        self.audit_cpu = Histogram()
+        self.stage_wall = {s: Histogram() for s in STAGES}
+        self.stage_cpu = {s: Histogram() for s in STAGES}
+        self.chunks = Histogram(CHUNK_BUCKETS)
+        self.audits = 0
+        self.cache_hits = 0
+        self.tokens = 0
+        self._spans = deque(maxlen=self.max_spans)
+
+    # Locks and histories do not travel to pool workers
+    def __getstate__(self):
+        return {"max_spans": self.max_spans}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.reset()
+
+    def record(self, trace: AuditTrace) -> None:
+        with self._lock:
+            self.audits += 1
+            self.cache_hits += trace.cache_hit
+            self.tokens += trace.token_count
+            self.audit_wall.observe(trace.wall)
+            self.audit_cpu.observe(trace.cpu)
+            if not trace.cache_hit:
+                self.chunks.observe(trace.chunk_count)
+            for name, (_, wall, cpu) in trace.stages.items():
+                if name not in self.stage_wall:
+                    self.stage_wall[name] = Histogram()
+                    self.stage_cpu[name] = Histogram()
+                self.stage_wall[name].observe(wall)
+                self.stage_cpu[name].observe(cpu)
+            self._spans.append((threading.get_ident(), trace))
+
+    def prometheus_text(self, prefix: str = "rigor_audit") -> str:
+        """Metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_total Audits recorded.",
+                f"# TYPE {prefix}_total counter",
+                f"{prefix}_total {self.audits}",
+                f"# HELP {prefix}_cache_hits_total Audits answered from the result cache.",
+                f"# TYPE {prefix}_cache_hits_total counter",
+                f"{prefix}_cache_hits_total {self.cache_hits}",
+                f"# HELP {prefix}_tokens_total Distinct chunk tokens processed.",
+                f"# TYPE {prefix}_tokens_total counter",
+                f"{prefix}_tokens_total {self.tokens}",
+                f"# HELP {prefix}_seconds Wall time per audit.",
+                f"# TYPE {prefix}_seconds histogram",
+                *self.audit_wall.lines(f"{prefix}_seconds"),
+                f"# HELP {prefix}_cpu_seconds CPU time per audit.",
+                f"# TYPE {prefix}_cpu_seconds histogram",
+                *self.audit_cpu.lines(f"{prefix}_cpu_seconds"),
+                f"# HELP {prefix}_chunks Chunks per computed audit.",
+                f"# TYPE {prefix}_chunks histogram",
+                *self.chunks.lines(f"{prefix}_chunks"),
+                f"# HELP {prefix}_stage_seconds Wall time per audit stage.",
+                f"# TYPE {prefix}_stage_seconds histogram",
+            ]
+            for name, hist in self.stage_wall.items():
+                lines.extend(hist.lines(f"{prefix}_stage_seconds", f'stage="{name}"'))
+            lines.append(f"# HELP {prefix}_stage_cpu_seconds CPU time per audit stage.")
+            lines.append(f"# TYPE {prefix}_stage_cpu_seconds histogram")
+            for name, hist in self.stage_cpu.items():
+                lines.extend(hist.lines(f"{prefix}_stage_cpu_seconds", f'stage="{name}"'))
+        return "\n".join(lines) + "\n"
+
+    def trace_events(self) -> List[Dict]:
+        """Recent audits as Chrome trace 'complete' events (one per audit and per stage)."""
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            spans = list(self._spans)
+        for tid, trace in spans:
+            start_us = trace.start * 1e6
+            args = {"chunks": trace.chunk_count, "tokens": trace.token_count,
+                    "cpu_ms": round(trace.cpu * 1000.0, 3), "cache_hit": trace.cache_hit}
+            events.append({"name": "audit", "cat": "audit", "ph": "X", "pid": pid, "tid": tid,
+                           "ts": start_us, "dur": trace.wall * 1e6, "args": args})
+            for name, (offset, wall, cpu) in trace.stages.items():
+                events.append({"name": name, "cat": "stage", "ph": "X", "pid": pid, "tid": tid,
+                               "ts": start_us + offset * 1e6, "dur": wall * 1e6,
+                               "args": {"cpu_ms": round(cpu * 1000.0, 3)}})
+        return events
+
+    def write_trace(self, path: str) -> None:
+        """Writes recent spans as a Chrome trace JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+
+
+_COLLECTOR = MetricsCollector()
+
+
+def get_collector() -> MetricsCollector:
+    """The process-wide collector."""
+    return _COLLECTOR
+
+
+class Instrumentation:
+    """
+    What to do with each audit's trace. Set on `IntegrityAuditor.instrumentation`.
+
+    Args:
+        attach: Store the trace on AuditResult.trace
+        callback: Called with (AuditTrace, AuditResult) after every audit
+        collector: MetricsCollector to record into (True = the process-wide one)
+    """
+
+    def __init__(self, attach: bool = True, callback: Optional[Callable] = None, collector=True):
+        self.attach = attach
+        self.callback = callback
+        self.collector = collector
+
+    def _resolve_collector(self) -> Optional[MetricsCollector]:
+        if self.collector is True:
+            return get_collector()
+        return self.collector or None
+
+    def emit(self, trace: AuditTrace, result) -> None:
+        trace.finish()
+        collector = self._resolve_collector()
+        if collector is not None:
+            collector.record(trace)
+        if self.callback is not None:
+            self.callback(trace, result)
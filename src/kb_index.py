@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.corpus_stats import hash_terms, term_hash
+from src.metrics import TextLike
+from src.text_utils import WORD_RE, analyze
+
+# Local inverted index over the whole knowledge base, used to tell a retrieval
+# failure (the concept is in the corpus, the retriever did not return it) from
+# a corpus gap (no document mentions it) without a second retrieval round trip.
+#
+# Layout, all plain .npy files that load() memory-maps:
+#   terms.npy     sorted uint64 term hashes (corpus_stats.term_hash)
+#   offsets.npy   int64, postings of terms[i] are postings[offsets[i]:offsets[i + 1]]
+#   postings.npy  uint32 document numbers, ascending within each term
+#   docs.json     external document ids, read on first access
+# A term lookup is one binary search plus a slice of the mapped postings, so
+# probing a handful of missing concepts takes well under a millisecond.
+#
+# A concept is reported in a document when the document contains every word
+# of the concept. That is document-level, not an exact phrase match: a
+# multi-word concept can be reported for a document where its words are not
+# adjacent. Documents added after a load are held in memory and merged into
+# the arrays on the next lookup or save().
+
+FORMAT_VERSION = 1
+
+
+class KnowledgeBaseIndex:
+    """
+    Inverted index from terms to the documents containing them.
+
+    index = KnowledgeBaseIndex()
+    index.add_documents(texts, doc_ids=paths)
+    index.save("kb-index")
+    auditor = IntegrityAuditor(kb_index=KnowledgeBaseIndex.load("kb-index"))
+    """
+
+    def __init__(self):
+        self._terms = np.empty(0, dtype=np.uint64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.uint32)
+        self._pending: Dict[int, List[int]] = {}   # term hash -> documents added since last merge
+        self._doc_ids: Optional[List[Hashable]] = []
+        self._docs_path: Optional[str] = None
+        self._path: Optional[str] = None      # directory the arrays are memory-mapped from
+        self._digest: Optional[str] = None
+        self.doc_count = 0
+
+    def __len__(self) -> int:
+        """Number of indexed documents."""
+        return self.doc_count
+
+    @property
+    def doc_ids(self) -> List[Hashable]:
+        if self._doc_ids is None:
+            with open(self._docs_path, encoding="utf-8") as f:
+                self._doc_ids = json.load(f)
+        return self._doc_ids
+
+    def fingerprint(self) -> str:
+        """Digest of the index contents, computed once per change. Part of the audit cache key."""
+        if self._digest is None:
+            self._merge()
+            h = hashlib.sha256(str(self.doc_count).encode("ascii"))
+            for array, dtype in ((self._terms, "<u8"), (self._offsets, "<i8"), (self._postings, "<u4")):
+                h.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            h.update(json.dumps(self.doc_ids, default=str).encode("utf-8"))
+            self._digest = h.hexdigest()
+        return self._digest
+
+    # Pool workers re-open the memory-mapped arrays instead of receiving a pickled copy
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._path is not None and not self._pending and isinstance(self._postings, np.memmap):
+            for attr in self._FILES:
+                del state[attr]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for attr, name in self._FILES.items():
+            if attr not in state:
+                setattr(self, attr, np.load(os.path.join(self._path, name), mmap_mode="r"))
+
+    # --- Building ---
+
+    def add_document(self, text: TextLike, doc_id: Optional[Hashable] = None) -> int:
+        """Indexes one document; returns its document number. doc_id defaults to that number."""
+        number = self.doc_count
+        pending = self._pending
+        for tok in analyze(text).tokens:
+            pending.setdefault(term_hash(tok), []).append(number)
+        self.doc_ids.append(number if doc_id is None else doc_id)
+        self.doc_count += 1
+        self._digest = None
+        return number
+
+    def add_documents(self, texts: Iterable[TextLike], doc_ids: Optional[Iterable[Hashable]] = None) -> None:
+        """Adds documents incrementally; existing postings are kept."""
+        if doc_ids is None:
+            for text in texts:
+                self.add_document(text)
+        else:
+            for text, doc_id in zip(texts, doc_ids):
+                self.add_document(text, doc_id)
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+        new_terms = np.fromiter(
+            (h for h, docs in self._pending.items() for _ in docs), dtype=np.uint64
+        )
+        new_docs = np.fromiter(
+            (d for docs in self._pending.values() for d in docs), dtype=np.uint32
+        )
+        old_terms = np.repeat(self._terms, np.diff(self._offsets))
+        terms = np.concatenate([old_terms, new_terms])
+        docs = np.concatenate([self._postings, new_docs])
+        order = np.lexsort((docs, terms))
+        terms = terms[order]
+
+        self._terms, counts = np.unique(terms, return_counts=True)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._postings = docs[order]
+        self._pending = {}
+
+    # --- Lookup ---
+
+    def postings(self, term: str) -> np.ndarray:
+        """Ascending document numbers containing `term` (already lowercased)."""
+        self._merge()
+        h = np.uint64(term_hash(term))
+        i = int(np.searchsorted(self._terms, h))
+        if i == len(self._terms) or self._terms[i] != h:
+            return np.empty(0, dtype=np.uint32)
+        return self._postings[self._offsets[i]:self._offsets[i + 1]]
+
+    def document_frequencies(self, terms: Sequence[str]) -> np.ndarray:
+        """Number of documents containing each term (0 for unseen terms)."""
+        self._merge()
+        hashes = hash_terms(terms)
+        pos = np.minimum(np.searchsorted(self._terms, hashes), max(len(self._terms) - 1, 0))
+        df = np.zeros(len(hashes), dtype=np.int64)
+        if len(self._terms):
+            found = self._terms[pos] == hashes
+            df[found] = (self._offsets[pos + 1] - self._offsets[pos])[found]
+        return df
+
+    def documents_with(self, concept: str) -> np.ndarray:
+        """Document numbers containing every word of `concept`."""
+        words = sorted(set(WORD_RE.findall(concept.lower())))
+        if not words:
+            return np.empty(0, dtype=np.uint32)
+        # Intersect from the rarest word so the working set only shrinks
+        lists = sorted((self.postings(w) for w in words), key=len)
+        docs = lists[0]
+        for other in lists[1:]:
+            if not len(docs):
+                break
+            docs = np.intersect1d(docs, other, assume_unique=True)
+        return docs
+
+    def probe(self, concepts: Iterable[str], limit: Optional[int] = None) -> Dict[str, List[Hashable]]:
+        """
+        Maps each concept to the ids of the documents containing it (at most
+        `limit` per concept). An empty list means the corpus has no document
+        about it; a non-empty one means retrieval missed what the corpus has.
+        """
+        out = {}
+        for concept in concepts:
+            docs = self.documents_with(concept)
+            if limit is not None:
+                docs = docs[:limit]
+            ids = self.doc_ids
+            out[concept] = [ids[int(d)] for d in docs]
+        return out
+
+    # --- Persistence ---
+
+    _FILES = {"_terms": "terms.npy", "_offsets": "offsets.npy", "_postings": "postings.npy"}
+
+    def save(self, path: str) -> None:
+        """Writes the index as a directory of .npy arrays, docs.json and meta.json."""
+        self._merge()
+        os.makedirs(path, exist_ok=True)
+        doc_ids = self.doc_ids
+        for attr, name in self._FILES.items():
+            # Never truncate a file that live memory maps (maybe our own) point into
+            tmp = os.path.join(path, name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, getattr(self, attr))
+            os.replace(tmp, os.path.join(path, name))
+        tmp = os.path.join(path, "docs.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc_ids, f)
+        os.replace(tmp, os.path.join(path, "docs.json"))
+        meta = {"version": FORMAT_VERSION, "doc_count": self.doc_count, "terms": len(self._terms),
+                "digest": self.fingerprint()}
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "KnowledgeBaseIndex":
+        """Opens a saved index; with mmap=True postings are paged in only as they are read."""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported knowledge-base index version: {meta.get('version')}")
+
+        index = cls()
+        for attr, name in cls._FILES.items():
+            setattr(index, attr, np.load(os.path.join(path, name), mmap_mode="r" if mmap else None))
+        index.doc_count = meta["doc_count"]
+        index._doc_ids = None
+        index._docs_path = os.path.join(path, "docs.json")
+        index._digest = meta.get("digest")
+        if mmap:
+            index._path = path
+        return index
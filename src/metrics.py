@@ -1,5 +1,8 @@
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
+
+from src.concept_matcher import ConceptMatcher
+from src.text_utils import AnalyzedText, analyze
 
 # Pure Python implementation for Python 3.14 compatibility
 # (Avoiding sentence-transformers/numpy dependencies which may be broken)
@@ -8,84 +11,117 @@ def tokenize(text: str) -> set:
     """Simple tokenizer that splits by non-alphanumeric and lowercases."""
     return set(re.findall(r'\b\w+\b', text.lower()))
 
-def compute_jaccard_similarity(text1: str, text2: str) -> float:
-    """Computes Jaccard similarity between two texts."""
-    tokens1 = tokenize(text1)
-    tokens2 = tokenize(text2)
-    
+TextLike = Union[str, AnalyzedText]
+
+def compute_jaccard_similarity(text1: TextLike, text2: TextLike) -> float:
+    """Computes Jaccard similarity between two texts (raw or analyzed)."""
+    return token_jaccard(analyze(text1).tokens, analyze(text2).tokens)
+
+def token_jaccard(tokens1: frozenset, tokens2: frozenset) -> float:
+    """Jaccard similarity between two precomputed token sets."""
     if not tokens1 or not tokens2:
         return 0.0
         
     intersection = len(tokens1.intersection(tokens2))
-    union = len(tokens1.union(tokens2))
+    union = len(tokens1) + len(tokens2) - intersection
     
     return intersection / union if union > 0 else 0.0
 
-def compute_relevance(query: str, chunks: List[str]) -> List[float]:
+def compute_relevance(query: TextLike, chunks: List[TextLike]) -> List[float]:
     """
     Computes relevance based on token overlap (Jaccard).
+    Accepts raw strings or AnalyzedText objects; the query is lexed once.
     Returns a list of scores between 0.0 and 1.0.
     """
+    # Boost intersection for query terms to simulate "relevance"
+    # Jaccard is strict, so we might want a slightly looser metric:
+    # Overlap coefficient: intersection / min(len(query), len(chunk))
+    q_tokens = analyze(query).tokens
+    if not q_tokens:
+        return [0.0] * len(chunks)
+        
     scores = []
     for chunk in chunks:
-        # Boost intersection for query terms to simulate "relevance"
-        # Jaccard is strict, so we might want a slightly looser metric:
-        # Overlap coefficient: intersection / min(len(query), len(chunk))
-        q_tokens = tokenize(query)
-        c_tokens = tokenize(chunk)
-        
-        if not q_tokens:
-            scores.append(0.0)
-            continue
-            
+        c_tokens = analyze(chunk).tokens
         intersection = len(q_tokens.intersection(c_tokens))
         # Use a modified score: percentage of query tokens found in chunk
         # This is strictly better for "Retrieval" relevance than Jaccard
-        score = intersection / len(q_tokens) if q_tokens else 0.0
-        scores.append(score)
+        scores.append(intersection / len(q_tokens))
         
     return scores
 
-def compute_redundancy(chunks: List[str]) -> float:
+def compute_redundancy(chunks: List[TextLike]) -> float:
     """
     Computes a redundancy penalty based on pairwise Jaccard similarity.
+    Each chunk is tokenized once, not once per pair.
     Returns a score from 0.0 (unique) to 1.0 (highly redundant).
     """
+    return redundancy_details(chunks)["score"]
+
+def redundancy_details(chunks: List[TextLike], duplicate_threshold: Optional[float] = None) -> Dict:
+    """
+    compute_redundancy plus the pairs it saw along the way.
+    Returns a dict with 'score' and 'near_duplicates': (i, j, similarity)
+    pairs, i < j, with similarity > duplicate_threshold (none if it is None).
+    """
+    near_duplicates = []
     if len(chunks) < 2:
-        return 0.0
+        return {"score": 0.0, "near_duplicates": near_duplicates}
         
+    token_sets = [analyze(c).tokens for c in chunks]
     pairwise_scores = []
-    for i in range(len(chunks)):
-        for j in range(i + 1, len(chunks)):
-            sim = compute_jaccard_similarity(chunks[i], chunks[j])
+    for i in range(len(token_sets)):
+        for j in range(i + 1, len(token_sets)):
+            sim = token_jaccard(token_sets[i], token_sets[j])
             pairwise_scores.append(sim)
+            if duplicate_threshold is not None and sim > duplicate_threshold:
+                near_duplicates.append((i, j, sim))
     
-    if not pairwise_scores:
-        return 0.0
-        
-    # Average redundancy
+    # Average redundancy. Every other backend passes builtin sum() the same
+    # pairs in this row-major order (sum() is compensated from Python 3.12 on,
+    # so any other reduction would differ in the last bits)
     avg_redundancy = sum(pairwise_scores) / len(pairwise_scores)
-    return max(0.0, min(1.0, avg_redundancy))
+    return {"score": max(0.0, min(1.0, avg_redundancy)), "near_duplicates": near_duplicates}
 
-def compute_coverage(query_concepts: List[str], chunks: List[str]) -> Dict:
+def compute_coverage(query_concepts: List[str], chunks: List[TextLike], detail: bool = True) -> Dict:
     """
     Checks presence of query concepts in the retrieved chunks.
-    Returns a dict with 'score' and 'missing' concepts.
+    All concepts are matched in a single pass (see src/concept_matcher.py).
+    Returns a dict with 'score', 'missing' concepts and 'hits', mapping each
+    found concept to {chunk_index: occurrences}.
+    With detail=False only 'score' is computed ('missing' and 'hits' are empty).
     """
     if not query_concepts:
-        return {"score": 1.0, "missing": []}
+        return {"score": 1.0, "missing": [], "hits": {}}
+        
+    matcher = ConceptMatcher(query_concepts)
+    lowers = [analyze(c).lower for c in chunks]
+    if not detail:
+        return coverage_from_matches(query_concepts, matcher.patterns, found=matcher.found(lowers))
+    return coverage_from_matches(query_concepts, matcher.patterns, hits=matcher.scan(lowers))
+
+def coverage_from_matches(query_concepts: List[str], patterns: List[str],
+                          hits: Optional[Dict[int, Dict[int, int]]] = None,
+                          found: Optional[set] = None) -> Dict:
+    """
+    Builds compute_coverage's result from ConceptMatcher output: `hits` from
+    scan() for the detailed result, or only the `found` concept indices.
+    """
+    if hits is None:
+        n_missing = sum(1 for idx, p in enumerate(patterns) if p and idx not in found)
+        score = (len(query_concepts) - n_missing) / len(query_concepts)
+        return {"score": score, "missing": [], "hits": {}}
         
-    combined_text = " ".join(chunks).lower()
     missing = []
-    found_count = 0
-    
-    for concept in query_concepts:
-        # Simple string matching
-        if concept.lower() in combined_text:
-            found_count += 1
+    concept_hits = {}
+    for idx, concept in enumerate(query_concepts):
+        if idx in hits:
+            concept_hits[concept] = hits[idx]
+        elif not patterns[idx]:
+            # An empty concept trivially matches, as with the `in` check
+            concept_hits[concept] = {}
         else:
             missing.append(concept)
             
-    score = found_count / len(query_concepts)
-    return {"score": score, "missing": missing}
-
+    score = (len(query_concepts) - len(missing)) / len(query_concepts)
+    return {"score": score, "missing": missing, "hits": concept_hits}
@@ -0,0 +1,180 @@
+import math
+import random
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.metrics import TextLike, compute_redundancy, token_jaccard
+from src.text_utils import analyze
+
+# Approximate redundancy for large chunk lists.
+#
+# The exact metric (metrics.compute_redundancy) averages Jaccard over every
+# chunk pair, which is O(n^2). Here:
+#   - the average is estimated from uniformly sampled pairs, with a Hoeffding
+#     bound giving the sample size for a requested error / confidence;
+#   - near-duplicate pairs are found with MinHash signatures + LSH banding,
+#     then verified with the exact Jaccard so no false positives are reported.
+
+_PRIME = (1 << 31) - 1  # a * crc32(token) + b stays below 2**63
+
+
+def _token_hash(token: str) -> int:
+    # Stable across processes (unlike hash(), which is randomized per run)
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def hoeffding_sample_size(epsilon: float, delta: float) -> int:
+    """Pairs to sample so the mean is within +/- epsilon with probability 1 - delta."""
+    return int(math.ceil(math.log(2.0 / delta) / (2.0 * epsilon * epsilon)))
+
+
+def minhash_signatures(token_sets: List[frozenset], num_perm: int = 128, seed: int = 0) -> np.ndarray:
+    """
+    Computes a (n_chunks, num_perm) MinHash signature matrix.
+    Every distinct token is hashed once; the per-chunk minimum is taken with a
+    single vectorized reduceat over all chunks. Empty chunks get all-max rows.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+    vocab: Dict[str, int] = {}
+    flat: List[int] = []
+    offsets: List[int] = []
+    for tokens in token_sets:
+        offsets.append(len(flat))
+        for tok in tokens:
+            idx = vocab.get(tok)
+            if idx is None:
+                idx = vocab[tok] = len(vocab)
+            flat.append(idx)
+
+    sig = np.full((len(token_sets), num_perm), _PRIME, dtype=np.uint64)
+    if not flat:
+        return sig
+
+    base = np.fromiter((_token_hash(t) for t in vocab), dtype=np.uint64, count=len(vocab))
+    perm_hashes = (base[:, None] * a[None, :] + b[None, :]) % np.uint64(_PRIME)
+
+    gathered = perm_hashes[np.asarray(flat, dtype=np.int64)]
+    non_empty = [i for i, tokens in enumerate(token_sets) if tokens]
+    starts = np.asarray([offsets[i] for i in non_empty], dtype=np.int64)
+    sig[non_empty] = np.minimum.reduceat(gathered, starts, axis=0)
+    return sig
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) with bands * rows <= num_perm whose LSH S-curve
+    threshold (1/bands) ** (1/rows) is closest to, but not above, `threshold`.
+    Erring low favours recall; false candidates are removed by verification.
+    """
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        curve = (1.0 / bands) ** (1.0 / rows)
+        gap = threshold - curve
+        if 0 <= gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int, rows: int) -> set:
+    """Pairs (i, j), i < j, that share at least one identical signature band."""
+    candidates = set()
+    n = signatures.shape[0]
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            buckets[block[i].tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    candidates.add((members[x], members[y]))
+    return candidates
+
+
+def find_near_duplicates(token_sets: List[frozenset], threshold: float = 0.8,
+                         num_perm: int = 128, seed: int = 0) -> List[Tuple[int, int, float]]:
+    """
+    Near-duplicate chunk pairs with Jaccard >= threshold, as (i, j, similarity)
+    sorted by index. Roughly linear in the number of chunks.
+    """
+    # Empty sets all share the same all-max signature, so they would land in
+    # every bucket together and make O(n^2) candidates. Their Jaccard is 0 with
+    # everything, so they are left out of banding (unless threshold <= 0).
+    if threshold > 0:
+        keep = [i for i, tokens in enumerate(token_sets) if tokens]
+    else:
+        keep = list(range(len(token_sets)))
+    if len(keep) < 2:
+        return []
+    sig = minhash_signatures([token_sets[i] for i in keep], num_perm=num_perm, seed=seed)
+    bands, rows = choose_bands(num_perm, threshold)
+    pairs = []
+    for x, y in lsh_candidate_pairs(sig, bands, rows):
+        i, j = keep[x], keep[y]
+        sim = token_jaccard(token_sets[i], token_sets[j])
+        if sim >= threshold:
+            pairs.append((i, j, sim))
+    pairs.sort()
+    return pairs
+
+
+def sample_pairs(n: int, sample_size: int, seed: int = 0) -> List[Tuple[int, int]]:
+    """The uniformly drawn (i, j), i != j, pairs estimate_redundancy averages over."""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(sample_size):
+        i = rng.randrange(n)
+        j = rng.randrange(n - 1)
+        if j >= i:
+            j += 1
+        pairs.append((i, j))
+    return pairs
+
+
+def estimate_redundancy(chunks: List[TextLike], epsilon: float = 0.01, delta: float = 0.05,
+                        threshold: float = 0.8, num_perm: int = 128, seed: int = 0,
+                        find_duplicates: bool = True) -> Dict:
+    """
+    Approximate counterpart of metrics.compute_redundancy for large chunk lists.
+
+    Returns a dict with:
+    - 'score': average pairwise Jaccard, within +/- 'error_bound' of the exact
+      value with probability 1 - delta (error_bound is 0.0 when the list is
+      small enough that computing it exactly is cheaper than sampling)
+    - 'error_bound': the half-width of that interval
+    - 'near_duplicates': list of (i, j, similarity) pairs with similarity >= threshold
+      (empty when find_duplicates is False, which skips the MinHash/LSH pass)
+    """
+    token_sets = [analyze(c).tokens for c in chunks]
+    n = len(token_sets)
+    near_duplicates = find_near_duplicates(token_sets, threshold, num_perm, seed) if find_duplicates else []
+
+    total_pairs = n * (n - 1) // 2
+    sample_size = hoeffding_sample_size(epsilon, delta)
+    if total_pairs <= sample_size:
+        return {
+            "score": compute_redundancy(chunks),
+            "error_bound": 0.0,
+            "near_duplicates": near_duplicates,
+        }
+
+    total = 0.0
+    for i, j in sample_pairs(n, sample_size, seed):
+        total += token_jaccard(token_sets[i], token_sets[j])
+
+    score = max(0.0, min(1.0, total / sample_size))
+    return {
+        "score": score,
+        "error_bound": math.sqrt(math.log(2.0 / delta) / (2.0 * sample_size)),
+        "near_duplicates": near_duplicates,
+    }
@@ -0,0 +1,140 @@
+import heapq
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+from src import metrics, text_utils
+
+# Maximal Marginal Relevance selection, as recommended by the explainer.
+#
+#   MMR(i) = lambda * relevance(i) - (1 - lambda) * max_{s in selected} sim(i, s)
+#
+# Lazy greedy: the penalty term only grows as chunks are selected, so a
+# chunk's last computed score is an upper bound on its current one. Scores
+# sit in a max-heap and are refreshed only when they reach the top, against
+# just the chunks selected since their last refresh. Most of the pool is
+# never re-scored, unlike the naive O(k * n) re-evaluation per step.
+#
+# Similarities come from one row per *selected* chunk (k x n, never n x n):
+# a vectorized row of the token matrix when the numpy backend is active,
+# token-set Jaccard otherwise. Those rows also give every pairwise similarity
+# inside the selection, so re-auditing the subset needs no new pair work.
+#
+# rerank_mmr also audits the whole pool. The chunks are analyzed and the token
+# matrix is built once, and that one matrix gives the pool's relevance and
+# redundancy as well as the selection rows, so auditing and reranking a pool
+# costs no more than auditing it.
+
+
+@dataclass
+class MMRSelection:
+    indices: List[int]          # Selected positions in the original chunk list, in pick order
+    chunks: List[str]           # The selected chunks, in pick order
+    result: Any                 # AuditResult of the selected subset
+    pool_result: Any            # AuditResult of the whole chunk list
+
+
+def _check_lambda(lambda_mult: float) -> None:
+    if not 0.0 <= lambda_mult <= 1.0:
+        raise ValueError(f"lambda_mult must be in [0, 1], got {lambda_mult!r}")
+
+
+def lazy_greedy_mmr(relevance: Sequence[float], similarity_row: Callable[[int], Sequence[float]],
+                    k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Picks up to k indices by MMR.
+
+    Args:
+        relevance: Relevance score per candidate
+        similarity_row: Returns the similarities of candidate s to every candidate
+        k: Number to select
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity
+
+    Ties are broken towards the lower index.
+    """
+    _check_lambda(lambda_mult)
+    n = len(relevance)
+    k = min(k, n)
+    max_sim = [0.0] * n
+    # Entries: (-score, index, number of selected chunks the score accounts for)
+    heap = [(-lambda_mult * relevance[i], i, 0) for i in range(n)]
+    heapq.heapify(heap)
+
+    selected: List[int] = []
+    rows: List[Sequence[float]] = []
+    while heap and len(selected) < k:
+        neg_score, i, seen = heapq.heappop(heap)
+        if seen == len(selected):
+            selected.append(i)
+            rows.append(similarity_row(i))
+            continue
+        for row in rows[seen:]:
+            if row[i] > max_sim[i]:
+                max_sim[i] = row[i]
+        score = lambda_mult * relevance[i] - (1.0 - lambda_mult) * max_sim[i]
+        heapq.heappush(heap, (-score, i, len(selected)))
+    return selected
+
+
+def rerank_mmr(auditor, query: str, chunks: List[str], k: int, lambda_mult: float = 0.5,
+               relevance_scores: Optional[List[float]] = None) -> MMRSelection:
+    """
+    Selects a diverse, relevant subset of `chunks` and audits it and the whole pool.
+    Pass `relevance_scores` from an earlier audit of the same pool to reuse them.
+    """
+    _check_lambda(lambda_mult)
+    if not query or not chunks:
+        empty = auditor.build_empty_result()
+        return MMRSelection([], [], empty, empty)
+
+    query_text = text_utils.analyze(query)
+    chunk_texts = auditor.analyze_chunks(chunks)
+    matrix = auditor.token_matrix(chunk_texts)
+
+    if relevance_scores is None:
+        relevance_scores = auditor.compute_relevance(query_text, chunk_texts, matrix)
+
+    # The pool audit, from the same analysis and matrix the selection uses
+    concepts = text_utils.extract_key_concepts(query_text)
+    score_only = auditor.score_only
+    threshold = None if score_only else auditor.duplicate_threshold
+    redundancy_data = auditor.compute_redundancy(chunk_texts, matrix, threshold)
+    pool_coverage = metrics.compute_coverage(concepts, chunk_texts, detail=not score_only)
+    pool_result = auditor.build_result(relevance_scores, pool_coverage, redundancy_data["score"],
+                                       score_only, redundancy_data["near_duplicates"])
+    if k <= 0:
+        return MMRSelection([], [], auditor.build_empty_result(), pool_result)
+
+    if matrix is not None and not matrix.supports_pairwise():
+        matrix = None
+
+    rows = {}
+
+    def similarity_row(s: int):
+        if matrix is not None:
+            row = matrix.jaccard_rows([s])[0]
+        else:
+            tokens = chunk_texts[s].tokens
+            row = [metrics.token_jaccard(tokens, other.tokens) for other in chunk_texts]
+        rows[s] = row
+        return row
+
+    picked = lazy_greedy_mmr(relevance_scores, similarity_row, k, lambda_mult)
+
+    # Re-audit the subset from what is already computed
+    subset_texts = [chunk_texts[i] for i in picked]
+    subset_relevance = [relevance_scores[i] for i in picked]
+    coverage_data = metrics.compute_coverage(concepts, subset_texts)
+    pairwise_scores = []
+    near_duplicates = []
+    for a in range(len(picked)):
+        row = rows[picked[a]]
+        for b in range(a + 1, len(picked)):
+            sim = float(row[picked[b]])
+            pairwise_scores.append(sim)
+            if sim > auditor.duplicate_threshold:
+                near_duplicates.append((a, b, sim))
+    # Same pair order and reduction as metrics.redundancy_details
+    redundancy = max(0.0, min(1.0, sum(pairwise_scores) / len(pairwise_scores))) if pairwise_scores else 0.0
+
+    result = auditor.build_result(subset_relevance, coverage_data, redundancy, near_duplicates=near_duplicates)
+    return MMRSelection(picked, [chunks[i] for i in picked], result, pool_result)
@@ -5,14 +5,22 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from io import BytesIO
 from datetime import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
 
-def generate_pdf_report(audit_result, query: str):
-    """
-    Generates a PDF report for the audit result.
-    Returns: BytesIO object containing the PDF data.
-    """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """Paragraph styles for the report. Built once per process and shared by every render."""
     styles = getSampleStyleSheet()
     
     # Custom Styles
@@ -50,6 +58,21 @@ def generate_pdf_report(audit_result, query: str):
         spaceAfter=6
     )
     
+    return {"title": title_style, "subtitle": subtitle_style, "heading": heading_style, "body": body_style}
+
+def generate_pdf_report(audit_result, query: str):
+    """
+    Generates a PDF report for the audit result.
+    Returns: BytesIO object containing the PDF data.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = get_report_styles()
+    title_style = styles["title"]
+    subtitle_style = styles["subtitle"]
+    heading_style = styles["heading"]
+    body_style = styles["body"]
+    
     story = []
     
     # --- Header ---
@@ -131,3 +154,376 @@ def generate_pdf_report(audit_result, query: str):
     doc.build(story)
     buffer.seek(0)
     return buffer
+
+def report_key(audit_result, query: str) -> str:
+    """
+    Hash of everything the report shows (the generation timestamp aside).
+    Equal keys render identical reports, so the bytes can be reused.
+    """
+    payload = {
+        "query": query,
+        "score": round(float(audit_result.score), 6),
+        "status": audit_result.status,
+        "missing": list(audit_result.missing_concepts),
+        "redundancy": round(float(audit_result.redundancy_score), 6),
+        "explanation": {k: audit_result.explanation.get(k) for k in ("summary", "improvement_tip")},
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+class ReportRenderer:
+    """
+    Renders PDF reports on a background thread, keyed by report_key.
+    
+    submit() returns immediately with a Future of the PDF bytes; submitting
+    the same result again (e.g. a UI rerun) returns the existing Future
+    instead of rendering twice. The most recent `max_entries` reports are kept.
+    """
+    
+    def __init__(self, max_workers: int = 1, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-report")
+        self._futures: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def submit(self, audit_result, query: str) -> Future:
+        key = report_key(audit_result, query)
+        with self._lock:
+            future = self._futures.get(key)
+            # A failed render is retried on the next submit
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(key)
+                return future
+            future = self._executor.submit(_render_bytes, audit_result, query)
+            self._futures[key] = future
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+            return future
+        
+    def get(self, audit_result, query: str, timeout=None) -> bytes:
+        """Blocks until the report for this result is rendered."""
+        return self.submit(audit_result, query).result(timeout)
+        
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+def _render_bytes(audit_result, query: str) -> bytes:
+    return generate_pdf_report(audit_result, query).getvalue()
+
+# --- Bulk report bundle ---
+#
+# One PDF covering many audits: a summary of aggregate score statistics,
+# then one section per audit. reportlab keeps a document's whole story in
+# memory until build(), so records are rendered in shards of `shard_size`,
+# each straight to its own temporary file, while the statistics are
+# accumulated in a single pass. Each finished shard is copied into the output
+# file object by object (PdfAppender) and deleted, so only one shard's pages
+# are ever loaded and the output is never held in memory. The summary is
+# rendered last (it needs the totals) and its pages are listed first.
+
+STATUS_ORDER = ("Safe", "Risky", "Insufficient")
+
+class ReportStats:
+    """Streaming aggregate of audit scores: O(1) memory regardless of record count."""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = None
+        self.max = None
+        self.statuses: Dict[str, int] = {s: 0 for s in STATUS_ORDER}
+        self.histogram = [0] * 10  # 0-10, 10-20, ..., 90-100
+        self.with_missing = 0
+        self.high_redundancy = 0
+        
+    def add(self, audit_result) -> None:
+        score = float(audit_result.score)
+        self.count += 1
+        self.total += score
+        self.total_sq += score * score
+        self.min = score if self.min is None else min(self.min, score)
+        self.max = score if self.max is None else max(self.max, score)
+        self.statuses[audit_result.status] = self.statuses.get(audit_result.status, 0) + 1
+        self.histogram[min(9, max(0, int(score // 10)))] += 1
+        if audit_result.missing_concepts:
+            self.with_missing += 1
+        if audit_result.redundancy_score > 0.1:
+            self.high_redundancy += 1
+            
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+        
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return 0.0
+        var = (self.total_sq - self.count * self.mean ** 2) / (self.count - 1)
+        return math.sqrt(max(0.0, var))
+        
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min,
+            "max": self.max,
+            "statuses": dict(self.statuses),
+            "histogram": list(self.histogram),
+            "with_missing": self.with_missing,
+            "high_redundancy": self.high_redundancy,
+        }
+
+def _status_color(status: str):
+    if status == "Safe":
+        return colors.green
+    elif status == "Risky":
+        return colors.orange
+    return colors.red
+
+def _audit_section(number: int, query: str, audit_result) -> list:
+    """Flowables for one audit in the bulk report."""
+    styles = get_report_styles()
+    body_style = styles["body"]
+    status = audit_result.status
+    
+    section = [
+        Paragraph(f"Audit #{number}", styles["heading"]),
+        Paragraph(f"<b>Query:</b> {escape(query)}", body_style),
+    ]
+    t = Table([
+        ["Integrity Score", f"{audit_result.score:.1f} / 100"],
+        ["Assessment", status],
+        ["Redundancy", f"{audit_result.redundancy_score:.2f}"],
+    ], colWidths=[2*inch, 4*inch])
+    t.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (1, 1), (1, 1), _status_color(status)),
+        ('FONTNAME', (1, 1), (1, 1), 'Helvetica-Bold'),
+    ]))
+    section.append(t)
+    if audit_result.missing_concepts:
+        missing_text = escape(", ".join(audit_result.missing_concepts))
+        section.append(Paragraph(f"<b>Missing Concepts:</b> <font color='red'>{missing_text}</font>", body_style))
+    summary = audit_result.explanation.get('summary', "")
+    if summary:
+        section.append(Paragraph(escape(summary), body_style))
+    section.append(Spacer(1, 6))
+    return section
+
+def _summary_story(stats: ReportStats, title: str) -> list:
+    styles = get_report_styles()
+    body_style = styles["body"]
+    story = [
+        Paragraph("RIGOR-AI", styles["title"]),
+        Paragraph(escape(title), styles["subtitle"]),
+        HRFlowable(width="100%", thickness=1, color=colors.lightgrey),
+        Spacer(1, 12),
+        Paragraph(f"<b>Report Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", body_style),
+        Spacer(1, 12),
+        Paragraph("Aggregate Statistics", styles["heading"]),
+    ]
+    
+    fmt = lambda v: "-" if v is None else f"{v:.1f}"
+    rows = [
+        ["Audits", str(stats.count)],
+        ["Mean Score", fmt(stats.mean if stats.count else None)],
+        ["Std. Deviation", fmt(stats.std if stats.count else None)],
+        ["Min / Max", f"{fmt(stats.min)} / {fmt(stats.max)}"],
+    ]
+    for status in stats.statuses:
+        n = stats.statuses[status]
+        share = 100.0 * n / stats.count if stats.count else 0.0
+        rows.append([status, f"{n} ({share:.1f}%)"])
+    rows.append(["With Missing Concepts", str(stats.with_missing)])
+    rows.append(["Redundancy > 0.10", str(stats.high_redundancy)])
+    
+    t = Table(rows, colWidths=[2.5*inch, 3.5*inch])
+    t.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story.append(t)
+    story.append(Spacer(1, 12))
+    
+    story.append(Paragraph("Score Distribution", styles["heading"]))
+    hist = [["Score Range", "Audits"]]
+    for b, n in enumerate(stats.histogram):
+        hist.append([f"{b * 10}-{b * 10 + 10}", str(n)])
+    h = Table(hist, colWidths=[2.5*inch, 3.5*inch])
+    h.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ]))
+    story.append(h)
+    return story
+
+def _render_to_file(story: list, path: str) -> str:
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    doc.build(story)
+    return path
+
+def render_shard(records: List[Tuple[int, str, object]], path: str) -> str:
+    """Renders (number, query, AuditResult) records as one PDF file."""
+    story = []
+    for number, query, audit_result in records:
+        story.extend(_audit_section(number, query, audit_result))
+    return _render_to_file(story, path)
+
+def _iter_shards(records: Iterable[Tuple[str, object]], shard_size: int,
+                 stats: ReportStats) -> Iterator[List[Tuple[int, str, object]]]:
+    numbered = ((n, q, r) for n, (q, r) in enumerate(records, start=1))
+    while True:
+        shard = list(islice(numbered, shard_size))
+        if not shard:
+            return
+        for _, _, audit_result in shard:
+            stats.add(audit_result)
+        yield shard
+
+class PdfAppender:
+    """
+    Writes the pages of finished PDF files into one open binary file as they
+    are appended. Objects are copied as they are read, so memory holds one
+    input file at a time plus an offset per written object; the page tree,
+    catalog and cross-reference table are written by close().
+    """
+    
+    _CATALOG, _PAGES = 1, 2
+    
+    def __init__(self, f):
+        self.f = f
+        self.offsets = [0, 0, 0]   # byte offset per object number; 1 and 2 are written last
+        self.page_ids: List[int] = []
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        
+    def _write_object(self, number: int, obj) -> None:
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode("ascii"))
+        obj.write_to_stream(self.f)
+        self.f.write(b"\nendobj\n")
+        
+    def append(self, path: str, first: bool = False) -> None:
+        """Copies every page of the PDF at `path`; first=True lists them before the earlier pages."""
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+        
+        reader = PdfReader(path)
+        numbers: Dict[Tuple[int, int], int] = {}
+        todo = []
+        
+        def ref(indirect):
+            key = (indirect.idnum, indirect.generation)
+            number = numbers.get(key)
+            if number is None:
+                number = numbers[key] = len(self.offsets)
+                self.offsets.append(0)
+                todo.append(indirect)
+            return IndirectObject(number, 0, None)
+            
+        def remap(obj):
+            if isinstance(obj, IndirectObject):
+                return ref(obj)
+            if isinstance(obj, StreamObject):
+                out = StreamObject()
+                out.update({k: remap(v) for k, v in obj.items()})
+                out.set_data(obj._data)  # still encoded, written as is
+                return out
+            if isinstance(obj, DictionaryObject):
+                return DictionaryObject({k: remap(v) for k, v in obj.items()})
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(remap(v) for v in obj)
+            return obj
+            
+        # Pages first: reader.pages carries inherited attributes (MediaBox,
+        # Resources) on each page, and the source page tree is never copied
+        pages = list(reader.pages)
+        page_ids = [ref(page.indirect_reference).idnum for page in pages]
+        todo.clear()
+        for number, page in zip(page_ids, pages):
+            copy = DictionaryObject({k: remap(v) for k, v in page.items() if k != "/Parent"})
+            copy[NameObject("/Parent")] = IndirectObject(self._PAGES, 0, None)
+            self._write_object(number, copy)
+        while todo:
+            indirect = todo.pop()
+            self._write_object(numbers[(indirect.idnum, indirect.generation)], remap(indirect.get_object()))
+            
+        if first:
+            self.page_ids[:0] = page_ids
+        else:
+            self.page_ids.extend(page_ids)
+            
+    def close(self) -> None:
+        f = self.f
+        kids = " ".join(f"{n} 0 R" for n in self.page_ids)
+        self.offsets[self._PAGES] = f.tell()
+        f.write(f"{self._PAGES} 0 obj\n<< /Type /Pages /Kids [ {kids} ] /Count {len(self.page_ids)} >>\nendobj\n"
+                .encode("ascii"))
+        self.offsets[self._CATALOG] = f.tell()
+        f.write(f"{self._CATALOG} 0 obj\n<< /Type /Catalog /Pages {self._PAGES} 0 R >>\nendobj\n".encode("ascii"))
+        
+        xref = f.tell()
+        size = len(self.offsets)
+        f.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode("ascii"))
+        f.write("".join(f"{off:010d} 00000 n \n" for off in self.offsets[1:]).encode("ascii"))
+        f.write(f"trailer\n<< /Size {size} /Root {self._CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+                .encode("ascii"))
+
+def generate_bulk_report(records: Iterable[Tuple[str, object]], path: str, shard_size: int = 200,
+                         workers: int = 1, title: str = "Bulk Retrieval Integrity Report") -> Dict:
+    """
+    Renders one PDF for many audits and writes it to `path`.
+    
+    Args:
+        records: Iterable of (query, AuditResult); consumed lazily
+        path: Output file (written atomically)
+        shard_size: Audits rendered per intermediate PDF
+        workers: Processes rendering shards in parallel; 1 renders inline
+        title: Subtitle of the summary page
+        
+    Returns: The aggregate statistics shown on the summary page.
+    """
+    shard_size = max(1, shard_size)
+    stats = ReportStats()
+    out_dir = os.path.dirname(os.path.abspath(path))
+    
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=".report-") as tmp:
+        shards = _iter_shards(records, shard_size, stats)
+        partial = os.path.join(tmp, "bundle.pdf")
+        
+        with open(partial, "wb") as f:
+            out = PdfAppender(f)
+            
+            def flush(shard_path: str) -> None:
+                out.append(shard_path)
+                os.remove(shard_path)
+                
+            if workers <= 1:
+                for i, shard in enumerate(shards):
+                    flush(render_shard(shard, os.path.join(tmp, f"shard-{i:06d}.pdf")))
+            else:
+                # Bounded submission: at most 2 shards per worker held in memory,
+                # flushed into the output in shard order
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = deque()
+                    for i, shard in enumerate(shards):
+                        shard_path = os.path.join(tmp, f"shard-{i:06d}.pdf")
+                        pending.append(pool.submit(render_shard, shard, shard_path))
+                        if len(pending) >= 2 * workers:
+                            flush(pending.popleft().result())
+                    while pending:
+                        flush(pending.popleft().result())
+                        
+            summary_path = _render_to_file(_summary_story(stats, title), os.path.join(tmp, "summary.pdf"))
+            out.append(summary_path, first=True)
+            out.close()
+        os.replace(partial, path)
+    
+    return stats.to_dict()
@@ -0,0 +1,326 @@
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src import explainer
+
+# Compact storage for very large numbers of audit results.
+#
+# CompactResult is a __slots__ object holding the relevance scores as a
+# float32 array and the missing concepts as a tuple of interned strings.
+# The explanation dict is not stored: it is a pure function of the score,
+# status, mean relevance, missing concepts, corpus matches and redundancy, so
+# it is rebuilt on access from the same float64 values. concept_hits is
+# dropped.
+#
+# ResultStore is columnar. There is one NumPy structured row per audit, plus
+# three ragged columns (relevance scores, missing-concept ids, corpus-match
+# (concept id, document id) pairs) stored as flat arrays with offsets. Concept
+# strings and document ids are interned to integer ids. save()
+# writes plain .npy files and a JSON header; load() memory-maps them, so a
+# dashboard can scan months of audits without unpickling a single object.
+
+STATUSES = ("Safe", "Risky", "Insufficient")
+_STATUS_CODES = {s: i for i, s in enumerate(STATUSES)}
+
+ROW_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("score", "<f8"),            # score, coverage, redundancy and mean relevance
+    ("status", "u1"),            # are exact, so the rebuilt explanation matches
+    ("coverage", "<f8"),
+    ("redundancy", "<f8"),
+    ("mean_relevance", "<f8"),
+    ("n_chunks", "<u4"),
+    ("n_missing", "<u2"),
+])
+
+FORMAT_VERSION = 2
+
+# Document id of a corpus-match entry whose concept no document contains
+_NO_DOCUMENT = np.iinfo(np.uint32).max
+
+
+def _mean(values) -> float:
+    # Same formula as explainer.generate_audit_explanation
+    return sum(values) / len(values) if len(values) else 0.0
+
+
+class CompactResult:
+    """Read-only, low-footprint stand-in for AuditResult."""
+
+    __slots__ = ("score", "status", "coverage_score", "redundancy_score", "mean_relevance",
+                 "relevance", "missing_concepts", "corpus_matches")
+
+    def __init__(self, score: float, status: str, relevance, coverage_score: float,
+                 missing_concepts: Sequence[str], redundancy_score: float,
+                 mean_relevance: Optional[float] = None, corpus_matches: Optional[Dict[str, List]] = None):
+        self.score = score
+        self.status = status
+        self.relevance = relevance if isinstance(relevance, (array, np.ndarray)) else array("f", relevance)
+        self.coverage_score = coverage_score
+        self.missing_concepts = tuple(sys.intern(c) for c in missing_concepts)
+        self.redundancy_score = redundancy_score
+        self.mean_relevance = _mean(relevance) if mean_relevance is None else mean_relevance
+        self.corpus_matches = corpus_matches or {}
+
+    @classmethod
+    def from_result(cls, result) -> "CompactResult":
+        return cls(result.score, result.status, result.relevance_scores, result.coverage_score,
+                   result.missing_concepts, result.redundancy_score, _mean(result.relevance_scores),
+                   getattr(result, "corpus_matches", None))
+
+    @property
+    def relevance_scores(self) -> List[float]:
+        return [float(x) for x in self.relevance]
+
+    @property
+    def explanation(self) -> Dict[str, str]:
+        return explainer.generate_audit_explanation(
+            self.score, self.status, [self.mean_relevance],
+            {"missing": list(self.missing_concepts), "corpus_matches": self.corpus_matches},
+            self.redundancy_score
+        )
+
+    def to_result(self):
+        """Expands back into an AuditResult (relevance scores at float32 precision)."""
+        from src.auditor import AuditResult
+        return AuditResult(
+            score=float(self.score),
+            status=self.status,
+            relevance_scores=self.relevance_scores,
+            coverage_score=float(self.coverage_score),
+            missing_concepts=list(self.missing_concepts),
+            redundancy_score=float(self.redundancy_score),
+            explanation=self.explanation,
+            corpus_matches={c: list(docs) for c, docs in self.corpus_matches.items()},
+        )
+
+    def __repr__(self):
+        return f"CompactResult(score={self.score:.1f}, status={self.status!r}, chunks={len(self.relevance)})"
+
+
+class _Column:
+    """Growable 1-D NumPy buffer (amortized O(1) append)."""
+
+    def __init__(self, dtype, data: Optional[np.ndarray] = None):
+        self.data = np.empty(16, dtype=dtype) if data is None else data
+        self.size = 0 if data is None else len(data)
+
+    def _reserve(self, n: int) -> None:
+        need = self.size + n
+        if need > len(self.data) or not self.data.flags.writeable:
+            grown = np.empty(max(need, 2 * len(self.data), 16), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+
+    def append(self, value) -> None:
+        self._reserve(1)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values) -> None:
+        n = len(values)
+        self._reserve(n)
+        self.data[self.size:self.size + n] = values
+        self.size += n
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class ResultStore:
+    """
+    Columnar, append-only store of audit results.
+
+    store = ResultStore()
+    store.extend(item.result for item in auditor.audit_batch(pairs) if item.ok)
+    store.save("audits-2026-10")
+    ResultStore.load("audits-2026-10").status_counts()
+    """
+
+    def __init__(self):
+        self.concepts: List[str] = []
+        self._concept_ids: Dict[str, int] = {}
+        self.documents: List[Hashable] = []
+        self._document_ids: Dict[Hashable, int] = {}
+        self._rows = _Column(ROW_DTYPE)
+        self._relevance = _Column(np.float32)
+        self._relevance_offsets = _Column(np.int64)
+        self._missing = _Column(np.uint32)
+        self._missing_offsets = _Column(np.int64)
+        self._match_concepts = _Column(np.uint32)
+        self._match_documents = _Column(np.uint32)
+        self._match_offsets = _Column(np.int64)
+        self._relevance_offsets.append(0)
+        self._missing_offsets.append(0)
+        self._match_offsets.append(0)
+
+    def __len__(self) -> int:
+        return self._rows.size
+
+    # --- Writing ---
+
+    def intern(self, concept: str) -> int:
+        cid = self._concept_ids.get(concept)
+        if cid is None:
+            cid = len(self.concepts)
+            self.concepts.append(concept)
+            self._concept_ids[concept] = cid
+        return cid
+
+    def intern_document(self, doc_id: Hashable) -> int:
+        did = self._document_ids.get(doc_id)
+        if did is None:
+            did = len(self.documents)
+            self.documents.append(doc_id)
+            self._document_ids[doc_id] = did
+        return did
+
+    def append(self, result, timestamp: Optional[float] = None) -> int:
+        """Adds an AuditResult (or CompactResult); returns its row index."""
+        relevance = getattr(result, "relevance", None)
+        if relevance is None:
+            relevance = result.relevance_scores
+        missing = [self.intern(c) for c in result.missing_concepts]
+        mean_relevance = getattr(result, "mean_relevance", None)
+        if mean_relevance is None:
+            mean_relevance = _mean(relevance)
+
+        self._rows.append((
+            time.time() if timestamp is None else timestamp,
+            result.score,
+            _STATUS_CODES[result.status],
+            result.coverage_score,
+            result.redundancy_score,
+            mean_relevance,
+            len(relevance),
+            len(missing),
+        ))
+        self._relevance.extend(np.asarray(relevance, dtype=np.float32))
+        self._relevance_offsets.append(self._relevance.size)
+        self._missing.extend(np.asarray(missing, dtype=np.uint32))
+        self._missing_offsets.append(self._missing.size)
+
+        match_concepts, match_documents = [], []
+        for concept, doc_ids in (getattr(result, "corpus_matches", None) or {}).items():
+            cid = self.intern(concept)
+            dids = [self.intern_document(d) for d in doc_ids] or [_NO_DOCUMENT]
+            match_concepts.extend([cid] * len(dids))
+            match_documents.extend(dids)
+        self._match_concepts.extend(np.asarray(match_concepts, dtype=np.uint32))
+        self._match_documents.extend(np.asarray(match_documents, dtype=np.uint32))
+        self._match_offsets.append(self._match_concepts.size)
+        return self._rows.size - 1
+
+    def extend(self, results: Iterable, timestamp: Optional[float] = None) -> None:
+        for result in results:
+            self.append(result, timestamp)
+
+    # --- Reading ---
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Structured array of the scalar columns (a memory map after load())."""
+        return self._rows.view()
+
+    def relevance(self, i: int) -> np.ndarray:
+        offsets = self._relevance_offsets.data
+        return self._relevance.data[offsets[i]:offsets[i + 1]]
+
+    def missing(self, i: int) -> List[str]:
+        offsets = self._missing_offsets.data
+        return [self.concepts[c] for c in self._missing.data[offsets[i]:offsets[i + 1]]]
+
+    def corpus_matches(self, i: int) -> Dict[str, List[Hashable]]:
+        offsets = self._match_offsets.data
+        lo, hi = offsets[i], offsets[i + 1]
+        out: Dict[str, List[Hashable]] = {}
+        for c, d in zip(self._match_concepts.data[lo:hi].tolist(), self._match_documents.data[lo:hi].tolist()):
+            docs = out.setdefault(self.concepts[c], [])
+            if d != _NO_DOCUMENT:
+                docs.append(self.documents[d])
+        return out
+
+    def __getitem__(self, i: int) -> CompactResult:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        row = self._rows.data[i]
+        return CompactResult(float(row["score"]), STATUSES[row["status"]], self.relevance(i),
+                             float(row["coverage"]), self.missing(i), float(row["redundancy"]),
+                             float(row["mean_relevance"]), self.corpus_matches(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.rows["status"], minlength=len(STATUSES))
+        return {s: int(n) for s, n in zip(STATUSES, counts)}
+
+    def missing_concept_counts(self) -> Dict[str, int]:
+        """How many audits missed each concept, most frequent first."""
+        counts = np.bincount(self._missing.view(), minlength=len(self.concepts))
+        order = np.argsort(-counts, kind="stable")
+        return {self.concepts[i]: int(counts[i]) for i in order if counts[i]}
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        """Row indices with start <= timestamp < end."""
+        ts = self.rows["timestamp"]
+        return np.nonzero((ts >= start) & (ts < end))[0]
+
+    # --- Persistence ---
+
+    _FILES = {
+        "_rows": "rows.npy",
+        "_relevance": "relevance.npy",
+        "_relevance_offsets": "relevance_offsets.npy",
+        "_missing": "missing.npy",
+        "_missing_offsets": "missing_offsets.npy",
+        "_match_concepts": "match_concepts.npy",
+        "_match_documents": "match_documents.npy",
+        "_match_offsets": "match_offsets.npy",
+    }
+
+    def save(self, path: str) -> None:
+        """Writes the store as a directory of .npy columns plus meta.json."""
+        os.makedirs(path, exist_ok=True)
+        for attr, name in self._FILES.items():
+            # Never truncate a file that live memory maps (maybe our own) point into
+            tmp = os.path.join(path, name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, getattr(self, attr).view())
+            os.replace(tmp, os.path.join(path, name))
+        meta = {"version": FORMAT_VERSION, "count": len(self), "statuses": list(STATUSES), "concepts": self.concepts,
+                "documents": self.documents}
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "ResultStore":
+        """
+        Opens a saved store. With mmap=True columns are read-only memory maps;
+        appending copies them into memory first.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported result store version: {meta.get('version')}")
+
+        store = cls()
+        for attr, name in cls._FILES.items():
+            data = np.load(os.path.join(path, name), mmap_mode="r" if mmap else None)
+            setattr(store, attr, _Column(data.dtype, data))
+        store.concepts = list(meta["concepts"])
+        store._concept_ids = {c: i for i, c in enumerate(store.concepts)}
+        store.documents = list(meta["documents"])
+        store._document_ids = {d: i for i, d in enumerate(store.documents)}
+        return store
@@ -0,0 +1,169 @@
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from src import metrics, text_utils
+from src.concept_matcher import ConceptMatcher
+
+# Incremental audits for add/remove/replace-chunk workflows (paged retrieval,
+# rerankers dropping chunks one at a time).
+#
+# The session keeps running state so each change costs O(n) instead of a full
+# O(n^2) re-audit:
+#   - relevance per chunk (one O(1) computation per new chunk)
+#   - every pairwise Jaccard similarity, keyed by chunk serials (a new chunk is
+#     compared against the n others once; a removed chunk's pairs are dropped).
+#     result() adds them with sum() in the full audit's row-major pair order,
+#     so no Jaccard is recomputed and the redundancy is bit-identical
+#   - per-chunk concept hit counts (each chunk is scanned once on arrival)
+#   - the near-duplicate pairs found by those same comparisons, keyed by
+#     per-session chunk serials so they survive index shifts
+#
+# Concepts containing a space are the only ones that can match across the
+# " " joining two chunks in the full audit's coverage check, so those few are
+# re-matched over the joined text when a result is produced. Everything else
+# comes from the per-chunk counts, and result() equals a full
+# IntegrityAuditor.audit of the current chunk list. The session always
+# computes redundancy exactly; it does not switch to the sampled estimate for
+# very long lists.
+
+
+class AuditSession:
+    def __init__(self, auditor, query: str, chunks: Optional[List[str]] = None):
+        self.auditor = auditor
+        self.query = query
+        self.query_text = text_utils.analyze(query)
+        self.concepts = text_utils.extract_key_concepts(self.query_text)
+        self.matcher = ConceptMatcher(self.concepts)
+
+        # Concepts that can straddle a chunk boundary, re-matched on the joined text
+        self._spanning = [i for i, p in enumerate(self.matcher.patterns) if " " in p]
+        self._spanning_matcher = ConceptMatcher([self.concepts[i] for i in self._spanning])
+
+        self._texts: List[text_utils.AnalyzedText] = []
+        self._relevance: List[float] = []
+        self._hits: List[Dict[int, int]] = []
+        self._serials: List[int] = []
+        self._next_serial = itertools.count()
+        # (serial_a, serial_b), serial_a < serial_b -> similarity, for every pair of current chunks
+        self._pairs: Dict[Tuple[int, int], float] = {}
+        # (serial_a, serial_b), serial_a < serial_b -> similarity above the duplicate threshold
+        self._duplicates: Dict[Tuple[int, int], float] = {}
+
+        for chunk in chunks or []:
+            self.add_chunk(chunk)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @property
+    def chunks(self) -> List[str]:
+        return [t.text for t in self._texts]
+
+    def _compare_to_others(self, analyzed, serial: int) -> None:
+        """Records the similarity to every current chunk; pairs above the threshold also go to _duplicates."""
+        tokens = analyzed.tokens
+        threshold = self.auditor.duplicate_threshold
+        for other, other_serial in zip(self._texts, self._serials):
+            sim = metrics.token_jaccard(tokens, other.tokens)
+            key = (serial, other_serial) if serial < other_serial else (other_serial, serial)
+            self._pairs[key] = sim
+            if sim > threshold:
+                self._duplicates[key] = sim
+
+    def _analyze(self, chunk: str):
+        return self.auditor.analyze_chunks([chunk])[0]
+
+    def add_chunk(self, chunk: str, index: Optional[int] = None) -> None:
+        """Inserts a chunk at `index` (default: append)."""
+        analyzed = self._analyze(chunk)
+        if index is None:
+            index = len(self._texts)
+
+        serial = next(self._next_serial)
+        self._compare_to_others(analyzed, serial)
+        self._texts.insert(index, analyzed)
+        self._serials.insert(index, serial)
+        self._relevance.insert(index, self.auditor.compute_relevance(self.query_text, [analyzed])[0])
+        found = self.matcher.scan([analyzed.lower])
+        self._hits.insert(index, {idx: per_chunk[0] for idx, per_chunk in found.items()})
+
+    def remove_chunk(self, index: int) -> str:
+        """Removes and returns the chunk at `index`."""
+        analyzed = self._texts[index]
+        serial = self._serials[index]
+        for other_serial in self._serials:
+            if other_serial != serial:
+                key = (serial, other_serial) if serial < other_serial else (other_serial, serial)
+                del self._pairs[key]
+                self._duplicates.pop(key, None)
+        del self._texts[index]
+        del self._serials[index]
+        del self._relevance[index]
+        del self._hits[index]
+        return analyzed.text
+
+    def replace_chunk(self, index: int, chunk: str) -> str:
+        """Replaces the chunk at `index`, returning the old text."""
+        old = self.remove_chunk(index)
+        self.add_chunk(chunk, index)
+        return old
+
+    def _coverage(self) -> Dict:
+        if not self.concepts:
+            return {"score": 1.0, "missing": [], "hits": {}}
+
+        spanning = {}
+        if self._spanning:
+            found = self._spanning_matcher.scan([t.lower for t in self._texts])
+            spanning = {self._spanning[k]: per_chunk for k, per_chunk in found.items()}
+
+        per_concept: Dict[int, Dict[int, int]] = {}
+        for c, counts in enumerate(self._hits):
+            for idx, occurrences in counts.items():
+                per_concept.setdefault(idx, {})[c] = occurrences
+        per_concept.update(spanning)
+
+        missing = []
+        hits = {}
+        for idx, concept in enumerate(self.concepts):
+            if idx in per_concept:
+                hits[concept] = per_concept[idx]
+            elif not self.matcher.patterns[idx]:
+                hits[concept] = {}
+            else:
+                missing.append(concept)
+
+        score = (len(self.concepts) - len(missing)) / len(self.concepts)
+        return {"score": score, "missing": missing, "hits": hits}
+
+    def _redundancy(self) -> float:
+        n = len(self._texts)
+        if n < 2:
+            return 0.0
+        serials = self._serials
+        pairs = self._pairs
+
+        def row_major():
+            # Same pair order and reduction as metrics.redundancy_details
+            for a in range(n):
+                sa = serials[a]
+                for sb in serials[a + 1:]:
+                    yield pairs[(sa, sb) if sa < sb else (sb, sa)]
+
+        return max(0.0, min(1.0, sum(row_major()) / (n * (n - 1) // 2)))
+
+    def _near_duplicates(self) -> List[Tuple[int, int, float]]:
+        position = {serial: i for i, serial in enumerate(self._serials)}
+        pairs = []
+        for (a, b), sim in self._duplicates.items():
+            i, j = position[a], position[b]
+            pairs.append((i, j, sim) if i < j else (j, i, sim))
+        pairs.sort()
+        return pairs
+
+    def result(self):
+        """The AuditResult for the current chunk list."""
+        if not self.query or not self._texts:
+            return self.auditor.build_empty_result()
+        return self.auditor.build_result(list(self._relevance), self._coverage(), self._redundancy(),
+                                         near_duplicates=self._near_duplicates())
@@ -0,0 +1,266 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src import batch, metrics, minhash, text_utils, vectorized
+from src.concept_matcher import ConceptMatcher
+from src.instrumentation import NO_STAGE
+
+# Sharded execution of one audit over a very large chunk list.
+#
+# The chunk list is cut into contiguous shards and audited on a process pool
+# that receives the query, its concepts and the chunks once (pool
+# initializer). Each worker lexes only the chunks its tasks touch.
+#
+#   - relevance: per shard, concatenated in shard order
+#   - coverage: per shard, over the shard's joined text plus enough of the
+#     following chunks to hold the longest concept, so a concept spanning a
+#     shard boundary is still seen. Only occurrences starting inside the
+#     shard are kept, and the per-shard hits are unioned into exactly what
+#     one pass over the whole joined text finds.
+#   - redundancy, sampled path (above approx_redundancy_cutoff, which is
+#     always the case with the default cutoffs since shard_min_chunks is far
+#     larger): the same sampled pairs as minhash.estimate_redundancy, split
+#     across workers. Workers return each pair's similarity and the parent
+#     adds them in sample order, so the score is the serial one bit for bit.
+#     MinHash signatures are computed per shard, LSH bands are split across
+#     workers and candidate pairs are verified in parallel.
+#   - redundancy, exact path: only when approx_redundancy_cutoff is raised to
+#     at least the chunk count. One task per block pair (I, J), I <= J, of the
+#     similarity matrix; the block sums add up to the full pair sum, equal to
+#     the serial score within float rounding (about 1e-12), not bit for bit.
+#
+# Relevance, coverage and near-duplicates equal the serial audit's exactly.
+# The per-shard pass (lexing, relevance, concept scan, signatures) is timed
+# as the "relevance" stage; merging the concept hits as "coverage".
+
+_STATE = None
+
+
+class _ShardState:
+    def __init__(self, auditor, query: str, concepts: List[str], chunks: List[str], chunk_ids):
+        self.auditor = auditor
+        self.query_text = text_utils.analyze(query)
+        self.matcher = ConceptMatcher(concepts)
+        self.chunks = chunks
+        self.chunk_ids = chunk_ids
+        self.texts: Dict[int, text_utils.AnalyzedText] = {}
+
+    def analyzed(self, indices) -> List[text_utils.AnalyzedText]:
+        """Lexes the chunks at `indices` once per worker."""
+        texts = self.texts
+        todo = [i for i in indices if i not in texts]
+        if todo:
+            ids = None if self.chunk_ids is None else [self.chunk_ids[i] for i in todo]
+            for i, t in zip(todo, self.auditor.analyze_chunks([self.chunks[i] for i in todo], ids)):
+                texts[i] = t
+        return [texts[i] for i in indices]
+
+    def use_matrix(self) -> bool:
+        return vectorized.HAS_NUMPY and self.auditor.backend != "python"
+
+
+def _init_worker(auditor, query, concepts, chunks, chunk_ids) -> None:
+    global _STATE
+    _STATE = _ShardState(auditor, query, concepts, chunks, chunk_ids)
+    # Marks the process as a pool worker so nested audits never shard again
+    batch.init_worker(auditor)
+
+
+def _tail_end(state: _ShardState, end: int) -> int:
+    """First chunk index past the text a concept starting before `end` can reach."""
+    reach = max((len(p) for p in state.matcher.patterns), default=0) - 1
+    n = len(state.chunks)
+    stop = end
+    while reach > 0 and stop < n:
+        reach -= len(state.chunks[stop]) + 1  # joining space
+        stop += 1
+    return stop
+
+
+def _shard_task(start: int, end: int, detail: bool, signatures: Optional[Tuple[int, int]]):
+    """Relevance, concept matches and (optionally) MinHash signatures of chunks[start:end]."""
+    state = _STATE
+    texts = state.analyzed(range(start, end))
+    relevance = state.auditor.compute_relevance(state.query_text, texts)
+
+    found = hits = None
+    if state.matcher.concepts:
+        tail = state.analyzed(range(end, _tail_end(state, end)))
+        lowers = [t.lower for t in texts] + [t.lower for t in tail]
+        if detail:
+            hits = {}
+            for idx, per_chunk in state.matcher.scan(lowers).items():
+                kept = {start + c: k for c, k in per_chunk.items() if c < len(texts)}
+                if kept:
+                    hits[idx] = kept
+        else:
+            # Every match in this window is a real match in the full text
+            found = state.matcher.found(lowers)
+
+    sig = None
+    if signatures is not None:
+        num_perm, seed = signatures
+        sig = minhash.minhash_signatures([t.tokens for t in texts], num_perm=num_perm, seed=seed)
+    return relevance, hits, found, sig
+
+
+def _block_task(a0: int, a1: int, b0: int, b1: int, threshold: Optional[float]):
+    """Pair sum and near-duplicates between chunks[a0:a1] and chunks[b0:b1] (i < j within one block)."""
+    state = _STATE
+    same = a0 == b0
+    a_texts = state.analyzed(range(a0, a1))
+    b_texts = a_texts if same else state.analyzed(range(b0, b1))
+    na = len(a_texts)
+    total = 0.0
+    near_duplicates = []
+
+    matrix = vectorized.TokenMatrix(a_texts if same else a_texts + b_texts) if state.use_matrix() else None
+    if matrix is not None and matrix.supports_pairwise():
+        for start in range(0, na, vectorized.BLOCK_ROWS):
+            sim = matrix.jaccard_rows(slice(start, min(na, start + vectorized.BLOCK_ROWS)))
+            sim = np.triu(sim, k=start + 1) if same else sim[:, na:]
+            total += float(sim.sum())
+            if threshold is not None:
+                rows, cols = np.nonzero(sim > threshold)
+                near_duplicates.extend(zip((rows + a0 + start).tolist(), (cols + b0).tolist(),
+                                           sim[rows, cols].tolist()))
+        return total, near_duplicates
+
+    for x, a in enumerate(a_texts):
+        for y in range(x + 1 if same else 0, len(b_texts)):
+            sim = metrics.token_jaccard(a.tokens, b_texts[y].tokens)
+            total += sim
+            if threshold is not None and sim > threshold:
+                near_duplicates.append((a0 + x, b0 + y, sim))
+    return total, near_duplicates
+
+
+def _sample_task(pairs: List[Tuple[int, int]]) -> List[float]:
+    """Jaccard similarity of each sampled pair, in order."""
+    state = _STATE
+    out = []
+    for i, j in pairs:
+        a, b = state.analyzed((i, j))
+        out.append(metrics.token_jaccard(a.tokens, b.tokens))
+    return out
+
+
+def _band_task(sig_columns: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """LSH candidates from a slice of signature bands, as i * n + j codes."""
+    n = sig_columns.shape[0]
+    candidates = minhash.lsh_candidate_pairs(sig_columns, bands, rows)
+    return np.fromiter((i * n + j for i, j in candidates), dtype=np.int64, count=len(candidates))
+
+
+def _verify_task(codes: np.ndarray, n: int, threshold: float) -> List[Tuple[int, int, float]]:
+    """Candidate pairs whose exact Jaccard is above the threshold."""
+    state = _STATE
+    out = []
+    for code in codes.tolist():
+        i, j = divmod(code, n)
+        a, b = state.analyzed((i, j))
+        sim = metrics.token_jaccard(a.tokens, b.tokens)
+        if sim > threshold:
+            out.append((i, j, sim))
+    return out
+
+
+def _split(items, parts: int) -> list:
+    size = max(1, math.ceil(len(items) / parts))
+    return [items[k:k + size] for k in range(0, len(items), size)]
+
+
+def shard_workers(auditor, n_chunks: int) -> int:
+    """Processes a single audit of n_chunks should use (1 = run serially)."""
+    if n_chunks < auditor.shard_min_chunks or batch.worker_auditor() is not None:
+        return 1
+    workers = auditor.shard_workers or os.cpu_count() or 1
+    return max(1, min(workers, n_chunks // max(1, auditor.shard_size)))
+
+
+def sharded_audit(auditor, query: str, chunks: List[str], chunk_ids, workers: int,
+                  trace=None, score_only: bool = False):
+    """IntegrityAuditor._audit for one large chunk list, across `workers` processes."""
+    stage = trace.stage if trace is not None else (lambda name: NO_STAGE)
+    n = len(chunks)
+    with stage("concepts"):
+        concepts = text_utils.extract_key_concepts(query)
+
+    # Two shards per worker evens out uneven chunk lengths
+    n_shards = min(n, workers * 2)
+    bounds = [n * s // n_shards for s in range(n_shards + 1)]
+    shards = list(zip(bounds[:-1], bounds[1:]))
+
+    threshold = None if score_only else auditor.duplicate_threshold
+    approx = n > auditor.approx_redundancy_cutoff
+    sample_size = minhash.hoeffding_sample_size(auditor.redundancy_epsilon, auditor.redundancy_delta)
+    sampled = approx and n * (n - 1) // 2 > sample_size
+    num_perm, seed = 128, 0
+    signatures = (num_perm, seed) if sampled and threshold is not None else None
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(auditor, query, concepts, chunks, chunk_ids)) as pool:
+        with stage("relevance"):
+            parts = [f.result() for f in [pool.submit(_shard_task, a, b, not score_only, signatures)
+                                          for a, b in shards]]
+        relevance_scores = [s for part in parts for s in part[0]]
+
+        with stage("coverage"):
+            patterns = [c.lower() for c in concepts]  # as ConceptMatcher.patterns
+            if not concepts:
+                coverage_data = {"score": 1.0, "missing": [], "hits": {}}
+            elif score_only:
+                found = set().union(*(part[2] for part in parts))
+                coverage_data = metrics.coverage_from_matches(concepts, patterns, found=found)
+            else:
+                hits: Dict[int, Dict[int, int]] = {}
+                for part in parts:
+                    for idx, per_chunk in part[1].items():
+                        hits.setdefault(idx, {}).update(per_chunk)
+                coverage_data = metrics.coverage_from_matches(concepts, patterns, hits=hits)
+
+        with stage("redundancy"):
+            near_duplicates = []
+            if sampled:
+                pairs = minhash.sample_pairs(n, sample_size, seed)
+                # Added in sample order like estimate_redundancy, not per worker
+                total = 0.0
+                for part in pool.map(_sample_task, _split(pairs, workers)):
+                    for sim in part:
+                        total += sim
+                redundancy = max(0.0, min(1.0, total / sample_size))
+                if signatures is not None:
+                    sig = np.concatenate([part[3] for part in parts])
+                    near_duplicates = _lsh_near_duplicates(pool, sig, workers, threshold, num_perm)
+            else:
+                blocks = [(a0, a1, b0, b1) for s, (a0, a1) in enumerate(shards) for (b0, b1) in shards[s:]]
+                futures = [pool.submit(_block_task, *block, threshold) for block in blocks]
+                total = 0.0
+                for future in futures:
+                    block_total, block_pairs = future.result()
+                    total += block_total
+                    near_duplicates.extend(block_pairs)
+                redundancy = max(0.0, min(1.0, total / (n * (n - 1) // 2))) if n > 1 else 0.0
+            near_duplicates.sort()
+
+    if trace is not None:
+        trace.chunk_count = n
+    return auditor.build_result(relevance_scores, coverage_data, redundancy, score_only, near_duplicates)
+
+
+def _lsh_near_duplicates(pool, sig: np.ndarray, workers: int, threshold: float, num_perm: int):
+    """minhash.find_near_duplicates with bands and verification spread over the pool."""
+    n = sig.shape[0]
+    bands, rows = minhash.choose_bands(num_perm, threshold)
+    band_groups = _split(list(range(bands)), workers)
+    futures = [
+        pool.submit(_band_task, np.ascontiguousarray(sig[:, group[0] * rows:(group[-1] + 1) * rows]), len(group), rows)
+        for group in band_groups
+    ]
+    codes = np.unique(np.concatenate([f.result() for f in futures]))
+    verified = pool.map(_verify_task, _split(codes, workers * 4), [n] * (workers * 4), [threshold] * (workers * 4))
+    return [pair for part in verified for pair in part]
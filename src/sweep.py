@@ -0,0 +1,144 @@
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice
+from typing import Dict, List, Optional, Tuple
+
+from src import metrics, text_utils
+from src.concept_matcher import ConceptMatcher
+
+# top_k sweep: audit every prefix k = 1..N of a ranked chunk list, computing
+# each similarity and concept match once.
+#
+#   - relevance: each chunk is scored once; prefix k uses the first k scores
+#   - redundancy: every pair similarity is computed once (one full audit's
+#     worth). Prefix k's pair sum is builtin sum() over its pairs in the
+#     full audit's row-major order, so it equals audit(query, chunks[:k])
+#     bit for bit. That re-adds the pairs per prefix -- O(N^3) float
+#     additions in C over all prefixes, no repeated Jaccard work
+#   - near-duplicates: found by the same pass and sorted once by their later
+#     chunk, so prefix k's pairs are a leading slice of that list (ordered by
+#     (j, i) rather than the full audit's (i, j))
+#   - coverage: concepts are matched once over the full joined text; prefix k
+#     covers every occurrence that ends inside its own joined text, which is
+#     exactly what auditing the first k chunks would find
+#
+# Redundancy is always exact here (the sweep never uses the sampled estimate).
+
+
+def prefix_pair_sums(chunk_texts, matrix=None, duplicate_threshold: Optional[float] = None) -> Tuple[List[float], List]:
+    """
+    sums[k] = sum of pairwise Jaccard over the first k chunks (sums[0] = sums[1] = 0),
+    plus every (i, j, similarity) pair, i < j, above duplicate_threshold, sorted
+    by (j, i) so the pairs of prefix k are a leading slice.
+    """
+    n = len(chunk_texts)
+    # upper[i][m] = similarity of chunks i and i + 1 + m
+    upper: List[List[float]] = []
+    near_duplicates = []
+    if matrix is not None and matrix.supports_pairwise():
+        for start, sim in matrix.jaccard_blocks():
+            for a, row in enumerate(sim.tolist()):
+                upper.append(row[start + a + 1:])
+    else:
+        tokens = [t.tokens for t in chunk_texts]
+        for i in range(n):
+            upper.append([metrics.token_jaccard(tokens[i], tokens[j]) for j in range(i + 1, n)])
+    if duplicate_threshold is not None:
+        for i, row in enumerate(upper):
+            near_duplicates.extend((i, i + 1 + m, s) for m, s in enumerate(row) if s > duplicate_threshold)
+
+    # Each prefix is reduced on its own, like metrics.redundancy_details over
+    # chunks[:k]: builtin sum() of its pairs in row-major order
+    sums = [0.0] * (n + 1)
+    for k in range(2, n + 1):
+        sums[k] = sum(chain.from_iterable(islice(upper[i], k - 1 - i) for i in range(k - 1)))
+    near_duplicates.sort(key=lambda p: (p[1], p[0]))
+    return sums, near_duplicates
+
+
+def prefix_coverages(concepts: List[str], chunk_texts) -> List[Dict]:
+    """
+    coverage_data (as metrics.compute_coverage returns it) for every prefix
+    k = 1..N. Prefixes with no new matches share the previous prefix's dicts.
+    """
+    n = len(chunk_texts)
+    if not concepts:
+        return [{"score": 1.0, "missing": [], "hits": {}} for _ in range(n)]
+
+    lowers = [t.lower for t in chunk_texts]
+    starts, ends = [], []
+    offset = 0
+    for lower in lowers:
+        starts.append(offset)
+        offset += len(lower)
+        ends.append(offset)
+        offset += 1  # joining space
+
+    matcher = ConceptMatcher(concepts)
+    # (first prefix containing the match, concept, chunk the match starts in)
+    events = []
+    for idx, start, end in matcher.iter_matches(" ".join(lowers)):
+        events.append((bisect_left(ends, end) + 1, idx, bisect_right(starts, start) - 1))
+    events.sort()
+
+    always = {i for i, p in enumerate(matcher.patterns) if not p}
+    hits: Dict[int, Dict[int, int]] = {}
+    out = []
+    coverage = None
+    e = 0
+    for k in range(1, n + 1):
+        touched = set()
+        while e < len(events) and events[e][0] == k:
+            _, idx, chunk_idx = events[e]
+            if idx not in touched:
+                # Copy-on-write: earlier prefixes keep sharing the old dict
+                hits[idx] = dict(hits.get(idx, {}))
+                touched.add(idx)
+            per_chunk = hits[idx]
+            per_chunk[chunk_idx] = per_chunk.get(chunk_idx, 0) + 1
+            e += 1
+
+        if coverage is None or touched:
+            missing = []
+            prefix_hits = {}
+            for idx, concept in enumerate(concepts):
+                if idx in hits:
+                    prefix_hits[concept] = hits[idx]
+                elif idx in always:
+                    prefix_hits[concept] = {}
+                else:
+                    missing.append(concept)
+            coverage = {
+                "score": (len(concepts) - len(missing)) / len(concepts),
+                "missing": missing,
+                "hits": prefix_hits,
+            }
+        out.append(coverage)
+    return out
+
+
+def sweep_top_k(auditor, query: str, chunks: List[str]) -> List:
+    """AuditResults for chunks[:1], chunks[:2], ..., chunks[:N]."""
+    if not query or not chunks:
+        return [auditor.build_empty_result() for _ in chunks or []]
+
+    query_text = text_utils.analyze(query)
+    chunk_texts = auditor.analyze_chunks(chunks)
+    matrix = auditor.token_matrix(chunk_texts)
+
+    relevance = auditor.compute_relevance(query_text, chunk_texts, matrix)
+
+    concepts = text_utils.extract_key_concepts(query_text)
+    coverages = prefix_coverages(concepts, chunk_texts)
+    pair_sums, near_duplicates = prefix_pair_sums(chunk_texts, matrix, auditor.duplicate_threshold)
+
+    results = []
+    cut = 0
+    for k in range(1, len(chunks) + 1):
+        pairs = k * (k - 1) // 2
+        redundancy = max(0.0, min(1.0, pair_sums[k] / pairs)) if pairs else 0.0
+        # Pairs are sorted by their later chunk, so prefix k's are a leading slice
+        while cut < len(near_duplicates) and near_duplicates[cut][1] < k:
+            cut += 1
+        results.append(auditor.build_result(relevance[:k], coverages[k - 1], redundancy,
+                                            near_duplicates=near_duplicates[:cut]))
+    return results
@@ -1,19 +1,70 @@
 import re
-from typing import List
+from collections import Counter
+from functools import cached_property
+from typing import List, Union
 
 # Pure Python implementation for Python 3.14 compatibility
 # (Avoiding spacy dependencies)
 
-def extract_key_concepts(text: str) -> List[str]:
+WORD_RE = re.compile(r'\b\w+\b')
+CAP_PHRASE_RE = re.compile(r'\b[A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*\b')
+
+
+class AnalyzedText:
+    """
+    A query or chunk lexed once and shared by every metric.
+
+    Holds the original text, its lowercased form and token set. Capitalized
+    phrases are only needed for queries, and term counts only for BM25, so
+    both are computed on first access.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.tokens = frozenset(WORD_RE.findall(self.lower))
+
+    @cached_property
+    def cap_phrases(self) -> List[str]:
+        return CAP_PHRASE_RE.findall(self.text)
+
+    @cached_property
+    def term_counts(self) -> Counter:
+        return Counter(WORD_RE.findall(self.lower))
+
+    @cached_property
+    def token_length(self) -> int:
+        """Number of tokens, repeats included."""
+        return sum(self.term_counts.values())
+
+    def __repr__(self):
+        return f"AnalyzedText({self.text[:40]!r})"
+
+
+def analyze(text: Union[str, AnalyzedText]) -> AnalyzedText:
+    """Returns `text` as an AnalyzedText, lexing it only if it is a plain string."""
+    if isinstance(text, AnalyzedText):
+        return text
+    return AnalyzedText(text)
+
+
+def analyze_all(texts) -> List[AnalyzedText]:
+    """Analyzes a list of texts (strings or already analyzed) once each."""
+    return [analyze(t) for t in texts]
+
+
+def extract_key_concepts(text: Union[str, AnalyzedText]) -> List[str]:
     """
     Extracts key concepts (Capitalized phrases and significant nouns) from text.
+    Accepts a raw string or an AnalyzedText (reusing its phrases and tokens).
     Returns a list of unique concept strings.
     """
+    analyzed = analyze(text)
     concepts = set()
     
     # 1. Extract Capitalized Phrases (Approximation of Named Entities)
     # Regex for sequences of Capitalized Words (e.g. "Retrieval Integrity" or "API")
-    cap_phrases = re.findall(r'\b[A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*\b', text)
+    cap_phrases = analyzed.cap_phrases
     for phrase in cap_phrases:
         if len(phrase) > 1: # Ignore single letters
             concepts.add(phrase.lower())
@@ -27,7 +78,8 @@ def extract_key_concepts(text: str) -> List[str]:
         "who", "when", "where", "why", "how", "can", "could", "should", "would"
     }
     
-    words = re.findall(r'\b\w+\b', text.lower())
+    # Reuse the token set lexed once by AnalyzedText
+    words = analyzed.tokens
     
     # Heuristic: Important words are long (>4 chars) and not stopwords
     # Or just add them as "concepts" if they aren't already covered by phrases
@@ -0,0 +1,183 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src import metrics
+from src.metrics import TextLike
+from src.text_utils import analyze
+
+# Optional numpy backend for the relevance and redundancy metrics.
+#
+# Chunks are turned into a vocabulary-indexed CSR token matrix once. Relevance
+# is then a sparse row count against the query mask, and the pairwise
+# intersection matrix for redundancy is A @ A.T over the tokens shared by 2+
+# chunks (the only ones that can contribute to an intersection): a dense 0/1
+# matrix when it fits in MAX_DENSE_CELLS, scipy.sparse above that if installed.
+#
+# Intersections and set sizes are exact integers, so relevance scores are
+# bit-identical to metrics.compute_relevance and each pairwise Jaccard equals
+# metrics.token_jaccard. The redundancy average feeds those similarities to
+# builtin sum() in the same row-major pair order as metrics.redundancy_details,
+# so it is bit-identical too.
+# metrics.py remains the pure-Python fallback when numpy is unavailable.
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+    HAS_NUMPY = False
+
+try:
+    import scipy.sparse as sp
+except ImportError:
+    sp = None
+
+# Dense fallback budget: rows x shared-vocabulary cells (float32)
+MAX_DENSE_CELLS = 64_000_000
+# Row block used when materializing the similarity matrix
+BLOCK_ROWS = 512
+
+
+class TokenMatrix:
+    """
+    CSR token incidence matrix for a list of chunks.
+
+    Attributes:
+        vocab: token -> column index
+        indptr, indices: CSR structure (one row per chunk, unique columns)
+        sizes: number of distinct tokens per chunk
+    """
+
+    def __init__(self, chunks: List[TextLike]):
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for the vectorized backend")
+
+        self.vocab: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        vocab = self.vocab
+        for chunk in chunks:
+            for tok in analyze(chunk).tokens:
+                idx = vocab.get(tok)
+                if idx is None:
+                    idx = vocab[tok] = len(vocab)
+                indices.append(idx)
+            indptr.append(len(indices))
+
+        self.n = len(chunks)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.sizes = np.diff(self.indptr)
+        self.row_ids = np.repeat(np.arange(self.n, dtype=np.int64), self.sizes)
+        self._shared: Optional[object] = None
+
+    # --- Relevance ---
+
+    def relevance(self, query: TextLike) -> List[float]:
+        """Fraction of query tokens found in each chunk (same as metrics.compute_relevance)."""
+        q_tokens = analyze(query).tokens
+        if not q_tokens:
+            return [0.0] * self.n
+
+        mask = np.zeros(len(self.vocab), dtype=np.float64)
+        for tok in q_tokens:
+            idx = self.vocab.get(tok)
+            if idx is not None:
+                mask[idx] = 1.0
+
+        counts = np.bincount(self.row_ids, weights=mask[self.indices], minlength=self.n)
+        return (counts / len(q_tokens)).tolist()
+
+    # --- Redundancy ---
+
+    def _shared_matrix(self):
+        """Incidence matrix restricted to columns present in two or more chunks."""
+        if self._shared is not None:
+            return self._shared
+
+        df = np.bincount(self.indices, minlength=len(self.vocab))
+        keep = df[self.indices] >= 2
+        remap = np.cumsum(df >= 2) - 1
+        rows = self.row_ids[keep]
+        cols = remap[self.indices[keep]]
+        width = int((df >= 2).sum())
+
+        if self.n * width <= MAX_DENSE_CELLS:
+            # BLAS on a dense 0/1 matrix is the fastest option when it fits
+            dense = np.zeros((self.n, width), dtype=np.float32)
+            dense[rows, cols] = 1.0
+            self._shared = dense
+        elif sp is not None:
+            data = np.ones(len(rows), dtype=np.float64)
+            self._shared = sp.csr_matrix((data, (rows, cols)), shape=(self.n, width))
+        else:
+            self._shared = False
+        return self._shared
+
+    def supports_pairwise(self) -> bool:
+        """False when the matrix is too large for the dense path and scipy is missing."""
+        return self._shared_matrix() is not False
+
+    def jaccard_rows(self, rows) -> "np.ndarray":
+        """Jaccard similarity between the chunks in `rows` (slice or index array) and every chunk."""
+        shared = self._shared_matrix()
+        if shared is False:
+            raise MemoryError("token matrix too large for the dense backend; install scipy")
+
+        block = shared[rows] @ shared.T
+        if sp is not None and sp.issparse(block):
+            block = block.toarray()
+        inter = np.asarray(block, dtype=np.float64)
+        sizes = self.sizes.astype(np.float64)
+        row_sizes = sizes[rows]
+        union = row_sizes[:, None] + sizes[None, :] - inter
+        valid = (row_sizes[:, None] > 0) & (sizes[None, :] > 0)
+        sim = np.zeros_like(inter)
+        np.divide(inter, union, out=sim, where=valid)
+        return sim
+
+    def jaccard_blocks(self, block_rows: int = BLOCK_ROWS) -> Iterator[Tuple[int, "np.ndarray"]]:
+        """
+        Yields (row_start, block) pairs where block[a, j] is the Jaccard
+        similarity between chunk row_start + a and chunk j. Memory stays at
+        block_rows x n instead of n x n.
+        """
+        for start in range(0, self.n, block_rows):
+            yield start, self.jaccard_rows(slice(start, min(self.n, start + block_rows)))
+
+    def redundancy(self) -> float:
+        """Average pairwise Jaccard over all chunk pairs (same as metrics.compute_redundancy)."""
+        return self.redundancy_details()["score"]
+
+    def redundancy_details(self, duplicate_threshold: Optional[float] = None) -> Dict:
+        """Same as metrics.redundancy_details, one row block at a time."""
+        near_duplicates = []
+        if self.n < 2:
+            return {"score": 0.0, "near_duplicates": near_duplicates}
+        cols = np.arange(self.n)
+
+        def upper_values():
+            # Pairs i < j in row-major order, one block at a time
+            for start, sim in self.jaccard_blocks():
+                above = cols[None, :] > np.arange(start, start + len(sim))[:, None]
+                if duplicate_threshold is not None:
+                    rows, hit = np.nonzero(above & (sim > duplicate_threshold))
+                    near_duplicates.extend(zip((rows + start).tolist(), hit.tolist(), sim[rows, hit].tolist()))
+                yield from sim[above].tolist()
+
+        avg = sum(upper_values()) / (self.n * (self.n - 1) // 2)
+        return {"score": max(0.0, min(1.0, avg)), "near_duplicates": near_duplicates}
+
+
+def compute_relevance(query: TextLike, chunks: List[TextLike]) -> List[float]:
+    """Vectorized drop-in for metrics.compute_relevance."""
+    return TokenMatrix(chunks).relevance(query)
+
+
+def compute_redundancy(chunks: List[TextLike]) -> float:
+    """Vectorized drop-in for metrics.compute_redundancy."""
+    if len(chunks) < 2:
+        return 0.0
+    matrix = TokenMatrix(chunks)
+    if not matrix.supports_pairwise():
+        return metrics.compute_redundancy(chunks)
+    return matrix.redundancy()
@@ -4,7 +4,9 @@ import os
 # Add the current directory to sys.path so we can import src modules
 sys.path.append(os.getcwd())
 
+from src import text_utils, vectorized
 from src.auditor import IntegrityAuditor
+from src.evaluation import PoolEvaluator
 
 def verify():
     print("Initializing IntegrityAuditor...")
@@ -41,5 +43,38 @@ def verify():
     else:
         print("\n❌ Verification FAILED: Invalid score or status.")
 
+def verify_pool_relevance():
+    """PoolEvaluator's scipy and numpy relevance paths must agree with compute_relevance."""
+    import random
+    import numpy as np
+    
+    print("\nChecking pool relevance paths...")
+    rng = random.Random(0)
+    words = [f"term{i}" for i in range(300)]
+    pool = [" ".join(rng.choices(words, k=rng.randint(0, 30))) for _ in range(500)]
+    queries = [" ".join(rng.choices(words, k=rng.randint(0, 6))) for _ in range(50)] + ["", "unseen words only"]
+    
+    evaluator = PoolEvaluator(IntegrityAuditor(), pool)
+    expected = np.array([evaluator.auditor.compute_relevance(text_utils.analyze(q), evaluator.texts) for q in queries])
+    
+    paths = {}
+    scipy_sparse = vectorized.sp
+    if scipy_sparse is not None:
+        paths["scipy"] = evaluator.relevance_matrix(queries)
+    vectorized.sp = None
+    try:
+        paths["numpy"] = evaluator.relevance_matrix(queries)
+    finally:
+        vectorized.sp = scipy_sparse
+        
+    for name, got in paths.items():
+        if np.array_equal(got, expected):
+            print(f"✅ {name} path matches compute_relevance.")
+        else:
+            print(f"❌ {name} path differs by up to {np.abs(got - expected).max():.3g}.")
+    if scipy_sparse is None:
+        print("⚠️ scipy not installed: sparse path not checked.")
+
 if __name__ == "__main__":
     verify()
+    verify_pool_relevance()